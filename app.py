@@ -7,6 +7,7 @@ import boto3
 import constants
 import aws_cdk as cdk
 from components import AutoMLStack
+from components.cache import get_lookup_value
 
 
 app = cdk.App()
@@ -15,7 +16,11 @@ AutoMLStack(
     f"{constants.WORKLOAD_NAME}-Stack",
     description="Guidance for AI-driven player insights on AWS (SO9401)",
     env=cdk.Environment(
-        account=boto3.client("sts").get_caller_identity()["Account"],
+        account=get_lookup_value(
+            app,
+            "account",
+            lambda: boto3.client("sts").get_caller_identity()["Account"]
+        ),
         region=constants.REGION
     )
 )
@@ -0,0 +1,55 @@
+""" Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved. """
+""" SPDX-License-Identifier: MIT-0 """
+
+import time
+import uuid
+import argparse
+import boto3
+
+from botocore.exceptions import ClientError
+
+
+def wait_for_result(s3_client, output_location: str, failure_location: str, timeout: int) -> str:
+    # Poll the output, and failure locations until the asynchronous inference result is available
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        for location in [output_location, failure_location]:
+            bucket, key = location[len("s3://"):].split("/", 1)
+            try:
+                body = s3_client.get_object(Bucket=bucket, Key=key)["Body"].read().decode("utf-8")
+            except ClientError as e:
+                if e.response["Error"]["Code"] != "NoSuchKey":
+                    raise
+                continue
+            if location == failure_location:
+                raise Exception(f"Asynchronous inference failed: {body}")
+            return body
+        time.sleep(5)
+    raise Exception(f"Asynchronous inference result not available after {timeout} seconds")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--endpoint-name", type=str)
+    parser.add_argument("--bucket", type=str)
+    parser.add_argument("--input-file", type=str)
+    parser.add_argument("--timeout", type=int, default=900)
+    args, _ = parser.parse_known_args()
+
+    print(F"Using SageMaker Endpoint: {args.endpoint_name}")
+    s3_client = boto3.client("s3")
+    sm_runtime = boto3.client("sagemaker-runtime")
+
+    # Upload the CSV payload, without a header row, as the asynchronous inference input
+    input_key = f"async-inference/input/{uuid.uuid4()}.csv"
+    s3_client.upload_file(args.input_file, args.bucket, input_key)
+
+    print("Submitting asynchronous inference request ...")
+    response = sm_runtime.invoke_endpoint_async(
+        EndpointName=args.endpoint_name,
+        InputLocation=f"s3://{args.bucket}/{input_key}",
+        ContentType="text/csv"
+    )
+    print(f"Waiting for inference results: {response['OutputLocation']}")
+    result = wait_for_result(s3_client, response["OutputLocation"], response["FailureLocation"], args.timeout)
+    print(f"SageMaker returned the following response:\n{result}")
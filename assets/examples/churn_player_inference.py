@@ -0,0 +1,30 @@
+""" Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved. """
+""" SPDX-License-Identifier: MIT-0 """
+
+import json
+import argparse
+import boto3
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--function-name", type=str)
+    parser.add_argument("--player-ids", type=str, nargs="+")
+    args, _ = parser.parse_known_args()
+
+    print(F"Using Inference Function: {args.function_name}")
+    lambda_client = boto3.client("lambda")
+
+    print(f"Sending inference request for {len(args.player_ids)} players ...")
+    response = lambda_client.invoke(
+        FunctionName=args.function_name,
+        Payload=json.dumps({"player_ids": args.player_ids})
+    )
+    body = json.loads(json.loads(response["Payload"].read())["body"])
+    for player_id, prediction in body["predictions"].items():
+        print(f"{player_id}: {prediction}")
+    if body["missing"]:
+        print(f"No features found for players: {', '.join(body['missing'])}")
+    if body["unhosted"]:
+        print(f"No segment model hosted for players: {', '.join(body['unhosted'])}")
+    for error in body["errors"]:
+        print(f"Inference failed for {len(error['player_ids'])} players of segment '{error['segment']}': {error['message']}")
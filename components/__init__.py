@@ -3,11 +3,14 @@
 
 import constants
 import aws_cdk as cdk
+import aws_cdk.aws_iam as _iam
 
 from components.storage import Bucket
 from components.endpoint import Endpoint
 from components.pipeline import Pipeline
 from components.notification import Notification
+from components.featurestore import FeatureStore
+from components.inference import Inference
 from constructs import Construct
 
 class AutoMLStack(cdk.Stack):
@@ -19,7 +22,7 @@ class AutoMLStack(cdk.Stack):
         bucket = Bucket(self, "Bucket")
 
         # Initialize the SageMaker `Endpoint` deployment component
-        endpoint = Endpoint(self, "Endpoint")
+        endpoint = Endpoint(self, "Endpoint", bucket=bucket)
 
         # Initialize the AutoML `Pipeline` component
         pipeline = Pipeline(self, "Pipeline", endpoint=endpoint)
@@ -30,9 +33,49 @@ class AutoMLStack(cdk.Stack):
         # Give the workflow execution role access to the solution bucket
         bucket.solution_bucket.grant_read_write(pipeline.workflow_role)
 
+        # Give the endpoint function access to pass the workflow execution role to the multi-model
+        endpoint.function.add_to_role_policy(
+            _iam.PolicyStatement(
+                actions=["iam:PassRole"],
+                effect=_iam.Effect.ALLOW,
+                resources=[pipeline.workflow_role.role_arn]
+            )
+        )
+
+        # Give the endpoint function access to copy the model artifacts in the pipeline bucket into the multi-model
+        endpoint.function.add_to_role_policy(
+            _iam.PolicyStatement(
+                sid="ModelArtifactPermissions",
+                actions=[
+                    "s3:GetObject",
+                    "s3:PutObject"
+                ],
+                effect=_iam.Effect.ALLOW,
+                resources=[f"arn:{cdk.Aws.PARTITION}:s3:::{pipeline.default_bucket}/*"]
+            )
+        )
+
         # Give the notification function access to the solution bucket
         bucket.solution_bucket.grant_read_write(notification.function.role)
 
+        # Initialize the online `FeatureStore`, and player `Inference` components
+        if constants.ID_ATTRIBUTE:
+            feature_store = FeatureStore(self, "FeatureStore")
+
+            # Give the workflow execution role access to update the online features
+            feature_store.table.grant_write_data(pipeline.workflow_role)
+
+            # NOTE: Asynchronous endpoints do not support the real-time `InvokeEndpoint` API
+            if constants.ENDPOINT_TYPE != "ASYNC":
+                inference = Inference(self, "Inference", feature_store=feature_store)
+
+                # Add output for the player inference function name
+                cdk.CfnOutput(
+                    self,
+                    "InferenceFunctionName",
+                    value=inference.function.function_name
+                )
+
         # Add output for the data bucket name
         cdk.CfnOutput(
             self,
@@ -0,0 +1,76 @@
+""" Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved. """
+""" SPDX-License-Identifier: MIT-0 """
+
+import os
+import json
+import boto3
+import hashlib
+import constants
+
+from typing import Callable
+from constructs import Construct
+
+CACHE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), "cdk.cache")
+LOOKUP_FILE = os.path.join(CACHE_DIR, "lookups.json")
+
+
+def is_offline(scope: Construct) -> bool:
+    # Offline synth is enabled with `cdk synth -c offline=true`
+    return str(scope.node.try_get_context("offline")).lower() == "true"
+
+
+def _read_json(path: str) -> dict:
+    if not os.path.exists(path):
+        return {}
+    with open(path, "r") as f:
+        return json.load(f)
+
+
+def _write_json(path: str, data: dict) -> None:
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w") as f:
+        json.dump(data, f, indent=4)
+
+
+def get_lookup_value(scope: Construct, key: str, lookup: Callable[[], str]) -> str:
+    # Values supplied as CDK context take precedence, e.g. `cdk synth -c account=123456789012`
+    value = scope.node.try_get_context(key)
+    if value:
+        return value
+
+    # Cached lookup values are only valid for the configured region, SageMaker Domain, and AWS profile
+    # NOTE: Switching accounts without changing the profile, e.g. with environment credentials, requires deleting `cdk.cache`
+    cache = _read_json(LOOKUP_FILE)
+    scope_key = f"{boto3.Session().profile_name}/{constants.REGION}/{constants.SM_DOMAIN_ID}"
+    if cache.get("scope") != scope_key:
+        cache = {"scope": scope_key, "values": {}}
+    if key in cache["values"]:
+        return cache["values"][key]
+
+    if is_offline(scope):
+        raise Exception(f"Lookup value '{key}' not found. Please specify it as CDK context (-c {key}=<value>), or run `cdk synth` with AWS access to populate the lookup cache")
+    value = lookup()
+    cache["values"][key] = value
+    _write_json(LOOKUP_FILE, cache)
+    return value
+
+
+def get_cached_definition(scope: Construct, source_files: list, parameters: dict, build: Callable[[], str]) -> str:
+    # Key the cached definition on the contents of the source files, and the definition parameters
+    digest = hashlib.sha256()
+    for path in sorted(source_files):
+        with open(path, "rb") as f:
+            digest.update(f.read())
+    digest.update(json.dumps(parameters, sort_keys=True).encode("utf-8"))
+    definition_file = os.path.join(CACHE_DIR, f"pipeline-{digest.hexdigest()[:16]}.json")
+    if os.path.exists(definition_file):
+        with open(definition_file, "r") as f:
+            return f.read()
+
+    if is_offline(scope):
+        raise Exception("Cached pipeline definition not found. Please run `cdk synth` with AWS access to generate the pipeline definition")
+    definition = build()
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    with open(definition_file, "w") as f:
+        f.write(definition)
+    return definition
@@ -6,13 +6,29 @@ import constants
 import aws_cdk as cdk
 import aws_cdk.aws_lambda as _lambda
 import aws_cdk.aws_iam as _iam
+import aws_cdk.aws_dynamodb as _dynamodb
+import aws_cdk.aws_events as _events
+import aws_cdk.aws_events_targets as _targets
 
+from components.storage import Bucket
 from constructs import Construct
 
 class Endpoint(Construct):
 
-    def __init__(self, scope: Construct, id: str) -> None:
-        super().__init__(scope, id)
+    def __init__(self, scope: Construct, id: str, *, bucket: Bucket, **kwargs) -> None:
+        super().__init__(scope, id, **kwargs)
+
+        # Define the table to queue, and serialize, the deployments for each endpoint
+        self.deployment_table = _dynamodb.Table(
+            self,
+            "DeploymentTable",
+            partition_key=_dynamodb.Attribute(
+                name="endpoint_name",
+                type=_dynamodb.AttributeType.STRING
+            ),
+            billing_mode=_dynamodb.BillingMode.PAY_PER_REQUEST,
+            removal_policy=cdk.RemovalPolicy.DESTROY
+        )
 
         # Define the Lambda Function to deploy the best model
         self.function = _lambda.Function(
@@ -29,7 +45,15 @@ class Endpoint(Construct):
                 )
             ),
             handler="index.lambda_handler",
-            timeout=cdk.Duration.seconds(amount=60)
+            timeout=cdk.Duration.seconds(amount=300),
+            environment={
+                "DEPLOYMENT_TABLE": self.deployment_table.table_name,
+                "ASYNC_OUTPUT_PATH": f"s3://{bucket.solution_bucket.bucket_name}/async-inference",
+                "ASYNC_MAX_CONCURRENT_INVOCATIONS": str(constants.ASYNC_MAX_CONCURRENT_INVOCATIONS),
+                "ASYNC_MAX_INSTANCE_COUNT": str(constants.ASYNC_MAX_INSTANCE_COUNT),
+                "MULTI_MODEL_MAX_INSTANCE_COUNT": str(constants.MULTI_MODEL_MAX_INSTANCE_COUNT),
+                "MULTI_MODEL_INVOCATIONS_PER_INSTANCE": str(constants.MULTI_MODEL_INVOCATIONS_PER_INSTANCE)
+            }
         )
 
         # Add necessary permissions to create the Endpoint
@@ -39,7 +63,9 @@ class Endpoint(Construct):
                 actions=[
                     "sagemaker:CreateEndpointConfig",
                     "sagemaker:CreateEndpoint",
-                    "sagemaker:UpdateEndpoint"
+                    "sagemaker:UpdateEndpoint",
+                    "sagemaker:DescribeEndpoint",
+                    "sagemaker:DescribeEndpointConfig"
                 ],
                 effect=_iam.Effect.ALLOW,
                 resources=[
@@ -50,6 +76,17 @@ class Endpoint(Construct):
                 ]
             )
         )
+        self.function.add_to_role_policy(
+            _iam.PolicyStatement(
+                sid="MultiModelPermissions",
+                actions=[
+                    "sagemaker:DescribeModel",
+                    "sagemaker:CreateModel"
+                ],
+                effect=_iam.Effect.ALLOW,
+                resources=[f"arn:{cdk.Aws.PARTITION}:sagemaker:{cdk.Aws.REGION}:{cdk.Aws.ACCOUNT_ID}:model/*"]
+            )
+        )
         self.function.add_to_role_policy(
             _iam.PolicyStatement(
                 sid="AddTagsPermission",
@@ -58,3 +95,53 @@ class Endpoint(Construct):
                 resources=["*"]
             )
         )
+
+        # Give the endpoint function access to the deployment queue
+        self.deployment_table.grant_read_write_data(self.function)
+
+        # Complete the deployment, and apply any queued deployment, once the endpoint is in service
+        _events.Rule(
+            self,
+            "EndpointInServiceRule",
+            event_pattern=_events.EventPattern(
+                source=["aws.sagemaker"],
+                detail_type=["SageMaker Endpoint State Change"],
+                detail={
+                    "EndpointName": [f"{constants.WORKLOAD_NAME}-Endpoint"],
+                    "EndpointStatus": ["IN_SERVICE"]
+                }
+            ),
+            targets=[_targets.LambdaFunction(self.function)]
+        )
+
+        # Add the permissions to configure the asynchronous, and multi-model endpoint autoscaling
+        if constants.ENDPOINT_TYPE == "ASYNC" or constants.SEGMENTS:
+            self.function.add_to_role_policy(
+                _iam.PolicyStatement(
+                    sid="AutoscalingPermissions",
+                    actions=[
+                        "application-autoscaling:RegisterScalableTarget",
+                        "application-autoscaling:PutScalingPolicy",
+                        "cloudwatch:PutMetricAlarm",
+                        "cloudwatch:DescribeAlarms",
+                        "cloudwatch:DeleteAlarms",
+                        "sagemaker:DescribeEndpoint",
+                        "sagemaker:UpdateEndpointWeightsAndCapacities"
+                    ],
+                    effect=_iam.Effect.ALLOW,
+                    resources=["*"]
+                )
+            )
+            self.function.add_to_role_policy(
+                _iam.PolicyStatement(
+                    sid="AutoscalingServiceLinkedRolePermissions",
+                    actions=["iam:CreateServiceLinkedRole"],
+                    effect=_iam.Effect.ALLOW,
+                    resources=[f"arn:{cdk.Aws.PARTITION}:iam::{cdk.Aws.ACCOUNT_ID}:role/aws-service-role/sagemaker.application-autoscaling.amazonaws.com/*"],
+                    conditions={
+                        "StringLike": {
+                            "iam:AWSServiceName": "sagemaker.application-autoscaling.amazonaws.com"
+                        }
+                    }
+                )
+            )
@@ -1,9 +1,12 @@
 """ Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved. """
 """ SPDX-License-Identifier: MIT-0 """
 
+import os
 import json
+import uuid
 import boto3
 import time
+import datetime
 
 from botocore.exceptions import ClientError
 from aws_lambda_powertools import Tracer
@@ -12,12 +15,318 @@ from aws_lambda_powertools import Logger
 logger = Logger()
 tracer = Tracer()
 sm_client = boto3.client("sagemaker")
+s3_client = boto3.client("s3")
+autoscaling_client = boto3.client("application-autoscaling")
+cw_client = boto3.client("cloudwatch")
+deployment_table = boto3.resource("dynamodb").Table(os.environ["DEPLOYMENT_TABLE"])
+BUSY_STATUSES = ["Creating", "Updating", "SystemUpdating", "RollingBack", "Deleting"]
+
+
+def create_multi_model(model_names: list, segments: list, workload_name: str, version: str) -> str:
+    # Copy each segment model artifact into a shared S3 prefix, named after the segment
+    models = [sm_client.describe_model(ModelName=name) for name in model_names]
+    containers = [model.get("PrimaryContainer", model.get("Containers", [{}])[0]) for model in models]
+
+    # Multi-model endpoints host a single container, so fail fast on inference pipelines, mixed images, or mixed environments
+    # NOTE: Loading the segment models on a multi-model endpoint is verified by the pipeline benchmark, before deployment
+    for name, model in zip(model_names, models):
+        if len(model.get("Containers", [])) > 1:
+            raise Exception(f"Model {name} is an inference pipeline, which cannot be hosted on a multi-model endpoint")
+    if len({container["Image"] for container in containers}) > 1:
+        raise Exception("Segment models use different inference images, and cannot be hosted on a single multi-model endpoint")
+    for name, container in zip(model_names, containers):
+        if container.get("Environment", {}) != containers[0].get("Environment", {}):
+            raise Exception(f"Model {name} uses a different container environment than model {model_names[0]}, and cannot be hosted on a single multi-model endpoint")
+    bucket = containers[0]["ModelDataUrl"].split("/")[2]
+    prefix = f"{workload_name}/multi-model/{version}"
+    for segment, container in zip(segments, containers):
+        source_bucket, source_key = container["ModelDataUrl"][len("s3://"):].split("/", 1)
+        logger.info(f"Adding Model Artifact for Segment: {segment}")
+        s3_client.copy(
+            CopySource={"Bucket": source_bucket, "Key": source_key},
+            Bucket=bucket,
+            Key=f"{prefix}/{segment}.tar.gz"
+        )
+
+    # Create the multi-model, using the inference container from the first segment model
+    multi_model_name = f"{workload_name}-MultiModel-{version}"
+    sm_client.create_model(
+        ModelName=multi_model_name,
+        ExecutionRoleArn=models[0]["ExecutionRoleArn"],
+        PrimaryContainer={
+            "Image": containers[0]["Image"],
+            "Mode": "MultiModel",
+            "ModelDataUrl": f"s3://{bucket}/{prefix}/",
+            "Environment": containers[0].get("Environment", {})
+        },
+        Tags=[
+            {
+                "Key": "WorkloadName",
+                "Value": workload_name
+            }
+        ]
+    )
+    return multi_model_name
+
+def configure_async_autoscaling(endpoint_name: str) -> None:
+    # Scale the asynchronous endpoint on the size of the request backlog, down to zero instances
+    resource_id = f"endpoint/{endpoint_name}/variant/AllTraffic"
+    autoscaling_client.register_scalable_target(
+        ServiceNamespace="sagemaker",
+        ResourceId=resource_id,
+        ScalableDimension="sagemaker:variant:DesiredInstanceCount",
+        MinCapacity=0,
+        MaxCapacity=int(os.environ["ASYNC_MAX_INSTANCE_COUNT"])
+    )
+    autoscaling_client.put_scaling_policy(
+        PolicyName=f"{endpoint_name}-BacklogScaling",
+        ServiceNamespace="sagemaker",
+        ResourceId=resource_id,
+        ScalableDimension="sagemaker:variant:DesiredInstanceCount",
+        PolicyType="TargetTrackingScaling",
+        TargetTrackingScalingPolicyConfiguration={
+            "TargetValue": float(os.environ["ASYNC_MAX_CONCURRENT_INVOCATIONS"]),
+            "CustomizedMetricSpecification": {
+                "MetricName": "ApproximateBacklogSizePerInstance",
+                "Namespace": "AWS/SageMaker",
+                "Dimensions": [{"Name": "EndpointName", "Value": endpoint_name}],
+                "Statistic": "Average"
+            },
+            "ScaleInCooldown": 600,
+            "ScaleOutCooldown": 300
+        }
+    )
+
+    # Target tracking does not scale out from zero instances, so add a step scaling policy
+    # that adds an instance when there is a backlog without any capacity
+    response = autoscaling_client.put_scaling_policy(
+        PolicyName=f"{endpoint_name}-ScaleFromZero",
+        ServiceNamespace="sagemaker",
+        ResourceId=resource_id,
+        ScalableDimension="sagemaker:variant:DesiredInstanceCount",
+        PolicyType="StepScaling",
+        StepScalingPolicyConfiguration={
+            "AdjustmentType": "ChangeInCapacity",
+            "MetricAggregationType": "Average",
+            "Cooldown": 300,
+            "StepAdjustments": [{"MetricIntervalLowerBound": 0, "ScalingAdjustment": 1}]
+        }
+    )
+    cw_client.put_metric_alarm(
+        AlarmName=f"{endpoint_name}-HasBacklogWithoutCapacity",
+        MetricName="HasBacklogWithoutCapacity",
+        Namespace="AWS/SageMaker",
+        Dimensions=[{"Name": "EndpointName", "Value": endpoint_name}],
+        Statistic="Average",
+        Period=60,
+        EvaluationPeriods=2,
+        DatapointsToAlarm=2,
+        Threshold=1,
+        ComparisonOperator="GreaterThanOrEqualToThreshold",
+        TreatMissingData="missing",
+        AlarmActions=[response["PolicyARN"]]
+    )
+
+def configure_multi_model_autoscaling(endpoint_name: str) -> None:
+    # Scale the multi-model endpoint on the number of invocations per instance
+    resource_id = f"endpoint/{endpoint_name}/variant/AllTraffic"
+    autoscaling_client.register_scalable_target(
+        ServiceNamespace="sagemaker",
+        ResourceId=resource_id,
+        ScalableDimension="sagemaker:variant:DesiredInstanceCount",
+        MinCapacity=1,
+        MaxCapacity=int(os.environ["MULTI_MODEL_MAX_INSTANCE_COUNT"])
+    )
+    autoscaling_client.put_scaling_policy(
+        PolicyName=f"{endpoint_name}-InvocationScaling",
+        ServiceNamespace="sagemaker",
+        ResourceId=resource_id,
+        ScalableDimension="sagemaker:variant:DesiredInstanceCount",
+        PolicyType="TargetTrackingScaling",
+        TargetTrackingScalingPolicyConfiguration={
+            "TargetValue": float(os.environ["MULTI_MODEL_INVOCATIONS_PER_INSTANCE"]),
+            "PredefinedMetricSpecification": {
+                "PredefinedMetricType": "SageMakerVariantInvocationsPerInstance"
+            },
+            "ScaleInCooldown": 600,
+            "ScaleOutCooldown": 300
+        }
+    )
+
+
+def is_multi_model(endpoint_config: dict) -> bool:
+    variant = endpoint_config["ProductionVariants"][0]
+    if "ServerlessConfig" in variant:
+        return False
+    model = sm_client.describe_model(ModelName=variant["ModelName"])
+    return model.get("PrimaryContainer", {}).get("Mode") == "MultiModel"
+
+
+def get_requested_at(execution_start_time: str) -> int:
+    # Order the deployments by the start time of the pipeline execution, in nanoseconds, so that a slow execution
+    # can't replace the model of an execution that started later, falling back to the invocation time
+    if not execution_start_time:
+        return time.time_ns()
+    started = datetime.datetime.fromisoformat(execution_start_time.replace("Z", "+00:00"))
+    if started.tzinfo is None:
+        started = started.replace(tzinfo=datetime.timezone.utc)
+    epoch = datetime.datetime(1970, 1, 1, tzinfo=datetime.timezone.utc)
+    return (started - epoch) // datetime.timedelta(microseconds=1) * 1000
+
+
+def request_deployment(endpoint_name: str, endpoint_config_name: str, requested_at: int) -> bool:
+    # Queue the endpoint config as the pending deployment, unless a newer deployment has already been requested
+    # NOTE: A retry of the same execution has the same `requested_at`, and replaces its own request
+    try:
+        deployment_table.put_item(
+            Item={
+                "endpoint_name": endpoint_name,
+                "endpoint_config_name": endpoint_config_name,
+                "requested_at": requested_at,
+                "status": "PENDING"
+            },
+            ConditionExpression="attribute_not_exists(endpoint_name) OR requested_at <= :requested_at",
+            ExpressionAttributeValues={":requested_at": requested_at}
+        )
+        return True
+    except ClientError as e:
+        if e.response["Error"]["Code"] == "ConditionalCheckFailedException":
+            return False
+        raise
+
+
+def set_deployment_status(endpoint_name: str, endpoint_config_name: str, current_status: str, status: str, applied_at: int = None) -> bool:
+    # Conditionally change the status of the deployment, acting as the lock for the endpoint
+    update_expression = "SET #status = :status"
+    values = {
+        ":status": status,
+        ":current_status": current_status,
+        ":endpoint_config_name": endpoint_config_name
+    }
+    if applied_at is not None:
+        update_expression += ", applied_at = :applied_at"
+        values[":applied_at"] = applied_at
+    try:
+        deployment_table.update_item(
+            Key={"endpoint_name": endpoint_name},
+            UpdateExpression=update_expression,
+            ConditionExpression="#status = :current_status AND endpoint_config_name = :endpoint_config_name",
+            ExpressionAttributeNames={"#status": "status"},
+            ExpressionAttributeValues=values
+        )
+        return True
+    except ClientError as e:
+        if e.response["Error"]["Code"] == "ConditionalCheckFailedException":
+            return False
+        raise
+
+
+def describe_endpoint(endpoint_name: str) -> dict:
+    try:
+        return sm_client.describe_endpoint(EndpointName=endpoint_name)
+    except ClientError as e:
+        if "Could not find endpoint" in e.response["Error"]["Message"]:
+            return None
+        raise
+
+
+def apply_deployment(endpoint_name: str, workload_name: str) -> str:
+    # Apply the latest pending deployment, when the endpoint is not busy
+    deployment = deployment_table.get_item(Key={"endpoint_name": endpoint_name}, ConsistentRead=True).get("Item")
+    if deployment is None or deployment["status"] != "PENDING":
+        return deployment["status"] if deployment else None
+    endpoint = describe_endpoint(endpoint_name)
+    if endpoint is not None and endpoint["EndpointStatus"] in BUSY_STATUSES:
+        return "BUSY"
+    endpoint_config_name = deployment["endpoint_config_name"]
+    if not set_deployment_status(endpoint_name, endpoint_config_name, "PENDING", "APPLYING", applied_at=time.time_ns()):
+        return "BUSY"
+
+    try:
+        if endpoint is not None:
+            # Update the SageMaker Endpoint with the new configuration
+            logger.info(f"Updating Existing Endpoint with Config: {endpoint_config_name}")
+            sm_client.update_endpoint(
+                EndpointName=endpoint_name,
+                EndpointConfigName=endpoint_config_name
+            )
+        else:
+            # Create the SageMaker Endpoint
+            logger.info(f"Creating New Endpoint with Config: {endpoint_config_name}")
+            sm_client.create_endpoint(
+                EndpointName=endpoint_name,
+                EndpointConfigName=endpoint_config_name,
+                Tags=[
+                    {
+                        "Key": "WorkloadName",
+                        "Value": workload_name
+                    }
+                ]
+            )
+    except ClientError as e:
+        endpoint = describe_endpoint(endpoint_name) if e.response["Error"]["Code"] == "ValidationException" else None
+        if endpoint is not None and endpoint["EndpointStatus"] in BUSY_STATUSES:
+            # The endpoint became busy, so release the lock and apply the deployment once the endpoint is in service
+            logger.info(f"Endpoint {endpoint['EndpointStatus']}: {e.response['Error']['Message']}")
+            set_deployment_status(endpoint_name, endpoint_config_name, "APPLYING", "PENDING")
+            return "BUSY"
+        # Any other error is permanent, e.g. a missing model, an invalid config, or a failed endpoint
+        logger.error(f"Deployment of Endpoint Config {endpoint_config_name} Failed: {e.response['Error']['Message']}")
+        set_deployment_status(endpoint_name, endpoint_config_name, "APPLYING", "FAILED")
+        raise
+    return "APPLYING"
+
+
+def complete_deployment(endpoint_name: str, workload_name: str) -> None:
+    # Record the outcome of the applied deployment, and apply any deployment queued in the meantime
+    # NOTE: The deployment is read before the endpoint is described, so that a deployment applied concurrently
+    # is seen as `Updating` by the endpoint, instead of being mistaken for a rolled back deployment
+    deployment = deployment_table.get_item(Key={"endpoint_name": endpoint_name}, ConsistentRead=True).get("Item")
+    endpoint = describe_endpoint(endpoint_name)
+    if endpoint is None or endpoint["EndpointStatus"] != "InService":
+        return
+    if deployment is not None and deployment["status"] == "APPLYING":
+        if endpoint["EndpointConfigName"] == deployment["endpoint_config_name"]:
+            status = "DEPLOYED"
+        elif int(endpoint["LastModifiedTime"].timestamp() * 1e9) > int(deployment.get("applied_at", 0)):
+            # NOTE: A failed update rolls back to the previous config, and is not retried
+            status = "FAILED"
+        else:
+            # The deployment has been locked by a concurrent pipeline execution, but not applied to the endpoint yet
+            logger.info(f"Deployment of Endpoint Config {deployment['endpoint_config_name']} not Applied yet")
+            return
+        logger.info(f"Deployment of Endpoint Config {deployment['endpoint_config_name']}: {status}")
+        set_deployment_status(endpoint_name, deployment["endpoint_config_name"], "APPLYING", status)
+    apply_deployment(endpoint_name, workload_name)
+
+    # Configure autoscaling for asynchronous, and multi-model endpoints
+    endpoint_config = sm_client.describe_endpoint_config(EndpointConfigName=endpoint["EndpointConfigName"])
+    if "AsyncInferenceConfig" in endpoint_config:
+        logger.info(f"Configuring Autoscaling for Endpoint: {endpoint_name}")
+        configure_async_autoscaling(endpoint_name)
+    elif is_multi_model(endpoint_config):
+        logger.info(f"Configuring Autoscaling for Multi-Model Endpoint: {endpoint_name}")
+        configure_multi_model_autoscaling(endpoint_name)
 
 @tracer.capture_lambda_handler
 def lambda_handler(event, context):
 
+    # Complete the deployment once the endpoint is in service
+    if event.get("source") == "aws.sagemaker":
+        endpoint_name = event["detail"]["EndpointName"]
+        try:
+            complete_deployment(endpoint_name, workload_name=endpoint_name[:-len("-Endpoint")])
+        except ClientError as e:
+            message = e.response["Error"]["Message"]
+            raise Exception(message)
+        return {
+            "statusCode": 200,
+            "body": json.dumps({"EndpointName": endpoint_name})
+        }
+
     # The name of the model created in the Pipeline CreateModelStep
-    current_time = time.strftime("%m-%d-%H-%M-%S", time.localtime())
+    requested_at = get_requested_at(event.get("EXECUTION_START_TIME"))
+    current_time = f"{time.strftime('%Y%m%d-%H%M%S', time.gmtime())}-{uuid.uuid4().hex[:8]}"
     model_name = event["MODEL_NAME"]
     workload_name = event["WORKLOAD_NAME"]
     endpoint_config_name = f"{workload_name}-{current_time}"
@@ -27,7 +336,19 @@ def lambda_handler(event, context):
     response_body = {}
 
     try:
-        # Create the SageMaker Endpoint Configuration, based on the current time
+        # Combine the segment models into a single multi-model, routed by `TargetModel`
+        if "MODEL_NAMES" in event:
+            logger.info("Creating Multi-Model")
+            model_name = create_multi_model(
+                model_names=event["MODEL_NAMES"].split(","),
+                segments=event["SEGMENTS"].split(","),
+                workload_name=workload_name,
+                version=current_time
+            )
+            logger.info(f"Multi-Model: {model_name}")
+            response_body["ModelName"] = model_name
+
+        # Create the SageMaker Endpoint Configuration, based on the current time, and a unique suffix
         logger.info("Creating Endpoint Config")
         if endpoint_type == "SERVERLESS": 
             response = sm_client.create_endpoint_config(
@@ -68,8 +389,36 @@ def lambda_handler(event, context):
                     }
                 ]
             )
+        elif endpoint_type == "ASYNC":
+            response = sm_client.create_endpoint_config(
+                EndpointConfigName=endpoint_config_name,
+                ProductionVariants=[
+                    {
+                        "InstanceType": instance_type,
+                        "InitialVariantWeight": 1,
+                        "InitialInstanceCount": 1,
+                        "ModelName": model_name,
+                        "VariantName": "AllTraffic"
+                    }
+                ],
+                AsyncInferenceConfig={
+                    "OutputConfig": {
+                        "S3OutputPath": f"{os.environ['ASYNC_OUTPUT_PATH']}/output",
+                        "S3FailurePath": f"{os.environ['ASYNC_OUTPUT_PATH']}/failure"
+                    },
+                    "ClientConfig": {
+                        "MaxConcurrentInvocationsPerInstance": int(os.environ["ASYNC_MAX_CONCURRENT_INVOCATIONS"])
+                    }
+                },
+                Tags=[
+                    {
+                        "Key": "WorkloadName",
+                        "Value": workload_name
+                    }
+                ]
+            )
         else:
-            raise Exception("Invalid Endpoint Type. Please spcify 'HOSTED' or 'SERVERLESS'")
+            raise Exception("Invalid Endpoint Type. Please spcify 'HOSTED', 'SERVERLESS', or 'ASYNC'")
         logger.info(f"Endpoint Config: {response['EndpointConfigArn']}")
         response_body["EndpointConfigArn"] = response["EndpointConfigArn"]
 
@@ -78,35 +427,31 @@ def lambda_handler(event, context):
         raise Exception(message)
 
     try:
-        # Update the SageMaker Endpoint with the new configuration
-        logger.info("Updating Existing Endpoint")
-        response = sm_client.update_endpoint(
-            EndpointName=endpoint_name,
-            EndpointConfigName=endpoint_config_name
-        )
-        response_body["EndpointArn"] = response["EndpointArn"]
+        # Queue the deployment, superseding any older deployment that has not been applied yet
+        if not request_deployment(endpoint_name, endpoint_config_name, requested_at):
+            logger.info("Deployment Superseded by a Newer Deployment")
+            response_body["Status"] = "SUPERSEDED"
+            return {
+                "statusCode": 200,
+                "body": json.dumps(response_body)
+            }
+
+        # Retry with exponential backoff while the endpoint is busy, otherwise leave the deployment
+        # queued, to be applied when the endpoint is back in service
+        delay = 5
+        status = apply_deployment(endpoint_name, workload_name)
+        while status == "BUSY" and context.get_remaining_time_in_millis() > (delay + 30) * 1000:
+            logger.info(f"Endpoint Busy, Retrying in {delay} seconds")
+            time.sleep(delay)
+            delay = min(delay * 2, 60)
+            status = apply_deployment(endpoint_name, workload_name)
+        response_body["EndpointName"] = endpoint_name
+        response_body["Status"] = "QUEUED" if status == "BUSY" else status
+        logger.info(f"Deployment Status: {response_body['Status']}")
+
     except ClientError as e:
-        logger.info(f"Existing Endpoint Not Found")
-        logger.info(f"{e.response['Error']['Message']}") #Debug
-        try:
-            # Create the SageMaker Endpoint
-            logger.info("Creating New Endpoint")
-            response = sm_client.create_endpoint(
-                EndpointName=endpoint_name,
-                EndpointConfigName=endpoint_config_name,
-                Tags=[
-                    {
-                        "Key": "WorkloadName",
-                        "Value": workload_name
-                    }
-                ]
-            )
-            logger.info(f"Endpoint: {response['EndpointArn']}")
-            response_body["EndpointArn"] = response["EndpointArn"]
-        
-        except ClientError as e:
-            message = e.response["Error"]["Message"]
-            raise Exception(message)
+        message = e.response["Error"]["Message"]
+        raise Exception(message)
 
     return {
         "statusCode": 200,
@@ -0,0 +1,26 @@
+""" Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved. """
+""" SPDX-License-Identifier: MIT-0 """
+
+import constants
+import aws_cdk as cdk
+import aws_cdk.aws_dynamodb as _dynamodb
+
+from constructs import Construct
+
+class FeatureStore(Construct):
+
+    def __init__(self, scope: Construct, id: str) -> None:
+        super().__init__(scope, id)
+
+        # Define the online feature store table, holding the latest feature vector for each player
+        self.table = _dynamodb.Table(
+            self,
+            "FeatureTable",
+            table_name=f"{constants.WORKLOAD_NAME}-Features",
+            partition_key=_dynamodb.Attribute(
+                name=constants.ID_ATTRIBUTE,
+                type=_dynamodb.AttributeType.STRING
+            ),
+            billing_mode=_dynamodb.BillingMode.PAY_PER_REQUEST,
+            removal_policy=cdk.RemovalPolicy.DESTROY
+        )
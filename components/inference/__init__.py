@@ -0,0 +1,56 @@
+""" Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved. """
+""" SPDX-License-Identifier: MIT-0 """
+
+import os
+import constants
+import aws_cdk as cdk
+import aws_cdk.aws_lambda as _lambda
+import aws_cdk.aws_iam as _iam
+
+from components.featurestore import FeatureStore
+from constructs import Construct
+
+class Inference(Construct):
+
+    def __init__(self, scope: Construct, id: str, *, feature_store: FeatureStore, **kwargs) -> None:
+        super().__init__(scope, id, **kwargs)
+
+        # Define the Lambda Function to assemble the player features, and invoke the endpoint
+        self.function = _lambda.Function(
+            self,
+            "InferenceFunction",
+            runtime=_lambda.Runtime.PYTHON_3_11,
+            code=_lambda.Code.from_asset(
+                os.path.join(os.path.dirname(__file__), "runtime"),
+                bundling=cdk.BundlingOptions(
+                    image=_lambda.Runtime.PYTHON_3_11.bundling_image,
+                    command=[
+                        "bash", "-c", "pip install -r requirements.txt -t /asset-output && cp -au . /asset-output"
+                    ]
+                )
+            ),
+            handler="index.lambda_handler",
+            timeout=cdk.Duration.seconds(amount=60),
+            environment={
+                "ENDPOINT_NAME": f"{constants.WORKLOAD_NAME}-Endpoint",
+                "FEATURE_TABLE": feature_store.table.table_name,
+                "ID_ATTRIBUTE": constants.ID_ATTRIBUTE,
+                "SEGMENTS": ",".join(constants.SEGMENTS)
+            }
+        )
+
+        # Give the inference function access to read the player features
+        feature_store.table.grant_read_data(self.function)
+
+        # Give the inference function access to invoke the endpoint
+        self.function.add_to_role_policy(
+            _iam.PolicyStatement(
+                sid="InvokeEndpointPermissions",
+                actions=["sagemaker:InvokeEndpoint"],
+                effect=_iam.Effect.ALLOW,
+                resources=[
+                    f"arn:{cdk.Aws.PARTITION}:sagemaker:{cdk.Aws.REGION}:{cdk.Aws.ACCOUNT_ID}:endpoint/{constants.WORKLOAD_NAME}*",
+                    f"arn:{cdk.Aws.PARTITION}:sagemaker:{cdk.Aws.REGION}:{cdk.Aws.ACCOUNT_ID}:endpoint/{constants.WORKLOAD_NAME.lower()}*"
+                ]
+            )
+        )
@@ -0,0 +1,97 @@
+""" Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved. """
+""" SPDX-License-Identifier: MIT-0 """
+
+import os
+import json
+import boto3
+
+from botocore.exceptions import ClientError
+from aws_lambda_powertools import Tracer
+from aws_lambda_powertools import Logger
+
+tracer = Tracer()
+logger = Logger()
+dynamodb = boto3.resource("dynamodb")
+sm_runtime = boto3.client("sagemaker-runtime")
+MAX_LOOKUP_KEYS = 100  # Maximum number of keys for a DynamoDB `BatchGetItem` request
+MAX_INFERENCE_ROWS = 1000  # Keep the CSV payload well below the 6MB real-time endpoint limit
+
+
+def get_features(player_ids: list) -> dict:
+    # Bulk lookup of the latest feature vector for each player
+    id_attribute = os.environ["ID_ATTRIBUTE"]
+    table_name = os.environ["FEATURE_TABLE"]
+    features = {}
+    for i in range(0, len(player_ids), MAX_LOOKUP_KEYS):
+        request = {
+            table_name: {
+                "Keys": [{id_attribute: player_id} for player_id in player_ids[i:i + MAX_LOOKUP_KEYS]]
+            }
+        }
+        while request:
+            response = dynamodb.batch_get_item(RequestItems=request)
+            for item in response["Responses"].get(table_name, []):
+                features[item[id_attribute]] = item
+            request = response.get("UnprocessedKeys")
+    return features
+
+
+def group_by_segment(player_ids: list, features: dict, hosted_segments: list) -> tuple:
+    # Group the feature rows by segment, so that each request is routed to the segment model,
+    # skipping the players of segments that are not hosted on the multi-model endpoint
+    segments = {}
+    unhosted = []
+    for player_id in player_ids:
+        if player_id not in features:
+            continue
+        segment = features[player_id].get("segment", "") if hosted_segments else ""
+        if hosted_segments and segment not in hosted_segments:
+            unhosted.append(player_id)
+            continue
+        segments.setdefault(segment, []).append(player_id)
+    return segments, unhosted
+
+
+@tracer.capture_lambda_handler
+def lambda_handler(event, context):
+    endpoint_name = os.environ["ENDPOINT_NAME"]
+    hosted_segments = [segment for segment in os.environ.get("SEGMENTS", "").split(",") if segment]
+    player_ids = list(dict.fromkeys(event["player_ids"]))
+    logger.info(f"Looking up features for {len(player_ids)} players")
+    features = get_features(player_ids)
+    segments, unhosted = group_by_segment(player_ids, features, hosted_segments)
+
+    # Report the failed requests for each segment batch, instead of failing the whole request
+    predictions = {}
+    errors = []
+    for segment, segment_ids in segments.items():
+        for i in range(0, len(segment_ids), MAX_INFERENCE_ROWS):
+            batch_ids = segment_ids[i:i + MAX_INFERENCE_ROWS]
+            request = {
+                "EndpointName": endpoint_name,
+                "ContentType": "text/csv",
+                "Body": "\n".join(features[player_id]["features"] for player_id in batch_ids)
+            }
+            if segment:
+                request["TargetModel"] = f"{segment}.tar.gz"
+            try:
+                response = sm_runtime.invoke_endpoint(**request)
+            except ClientError as e:
+                message = e.response["Error"]["Message"]
+                logger.error(f"Inference Failed for Segment '{segment}': {message}")
+                errors.append({"segment": segment, "player_ids": batch_ids, "message": message})
+                continue
+            results = response["Body"].read().decode("utf-8").splitlines()
+            predictions.update(zip(batch_ids, results))
+
+    return {
+        "statusCode": 200,
+        "body": json.dumps(
+            {
+                "predictions": predictions,
+                "missing": [player_id for player_id in player_ids if player_id not in features],
+                "unhosted": unhosted,
+                "errors": errors
+            }
+        )
+    }
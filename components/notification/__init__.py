@@ -34,17 +34,18 @@ class Notification(Construct):
             handler="index.lambda_handler",
             timeout=cdk.Duration.seconds(amount=60),
             environment={
-                "PIPELINE_NAME": f"{constants.WORKLOAD_NAME}-AutoMLPipeline"
+                "PIPELINE_NAME": f"{constants.WORKLOAD_NAME}-AutoMLPipeline",
+                "MANIFEST_FILE": constants.MANIFEST_FILE
             }
         )
 
-        # Add the trigger using the `DATA_FILE` as the suffix
+        # Add the trigger using the `MANIFEST_FILE`, or the `DATA_FILE`, as the suffix
         notification = _notifications.LambdaDestination(self.function)
         notification.bind(self, bucket=bucket.solution_bucket)
         bucket.solution_bucket.add_object_created_notification(
             notification,
             _s3.NotificationKeyFilter(
-                suffix=constants.DATA_FILE
+                suffix=constants.MANIFEST_FILE or constants.DATA_FILE
             )
         )
 
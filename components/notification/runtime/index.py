@@ -7,21 +7,96 @@ import urllib.parse
 import json
 import boto3
 
+from concurrent.futures import ThreadPoolExecutor
 from botocore.exceptions import ClientError
 from aws_lambda_powertools import Tracer
 from aws_lambda_powertools import Logger
 
 tracer = Tracer()
 logger = Logger()
+s3_client = boto3.client("s3")
+
+
+class ManifestValidationError(Exception):
+    pass
+
+
+def validate_part(bucket: str, key: str, part: dict) -> None:
+    # Verify that the uploaded part matches the size, and checksum, listed in the manifest
+    try:
+        response = s3_client.get_object_attributes(
+            Bucket=bucket,
+            Key=key,
+            ObjectAttributes=["Checksum", "ObjectParts", "ObjectSize"]
+        )
+    except ClientError as e:
+        if e.response["Error"]["Code"] in ["NoSuchKey", "404"]:
+            raise ManifestValidationError(f"Dataset part '{key}' not found")
+        raise
+    if response["ObjectSize"] != part["size"]:
+        raise ManifestValidationError(f"Dataset part '{key}' size {response['ObjectSize']} does not match the manifest size {part['size']}")
+    if "checksum" not in part:
+        return
+
+    # NOTE: For multipart uploads, S3 stores the SHA256 of the part checksums, with a `-<part count>` suffix
+    checksum = response.get("Checksum", {}).get("ChecksumSHA256")
+    if checksum is None:
+        raise ManifestValidationError(f"Dataset part '{key}' was not uploaded with a SHA256 checksum")
+    if "ObjectParts" in response and "-" not in checksum:
+        checksum = f"{checksum}-{response['ObjectParts']['TotalPartsCount']}"
+    if checksum != part["checksum"]:
+        raise ManifestValidationError(f"Dataset part '{key}' SHA256 checksum {checksum} does not match the manifest checksum {part['checksum']}")
+
+
+def create_manifest(bucket: str, key: str, version_id: str) -> str:
+    # Read the manifest of dataset parts, relative to the manifest location
+    manifest = json.loads(
+        s3_client.get_object(Bucket=bucket, Key=key, VersionId=version_id)["Body"].read()
+    )
+    prefix = key.rsplit("/", 1)[0] + "/" if "/" in key else ""
+    parts = manifest["parts"]
+    logger.info(f"Validating {len(parts)} Dataset Parts ...")
+    with ThreadPoolExecutor(max_workers=16) as executor:
+        list(executor.map(lambda part: validate_part(bucket, prefix + part["key"], part), parts))
+
+    # Create the SageMaker `ManifestFile`, listing the validated dataset parts
+    sagemaker_manifest_key = f"{key}.sagemaker"
+    s3_client.put_object(
+        Bucket=bucket,
+        Key=sagemaker_manifest_key,
+        Body=json.dumps([{"prefix": f"s3://{bucket}/{prefix}"}] + [part["key"] for part in parts])
+    )
+    return sagemaker_manifest_key
+
 
 @tracer.capture_lambda_handler
 def lambda_handler(event, context):
     # print("Received event: " + json.dumps(event, indent=2)) # Debug
     pipeline_name = os.environ["PIPELINE_NAME"]
     bucket = event["Records"][0]["s3"]["bucket"]["name"]
-    key = event["Records"][0]["s3"]["object"]["key"]
+    key = urllib.parse.unquote_plus(event["Records"][0]["s3"]["object"]["key"])
     version_id = event["Records"][0]["s3"]["object"]["versionId"]
+    data_file = key.split("/")[-1]
     try:
+        # Commit the dataset parts listed in the manifest, and read all parts in the pipeline
+        if os.environ.get("MANIFEST_FILE"):
+            manifest_key = key
+            try:
+                key = create_manifest(bucket=bucket, key=manifest_key, version_id=version_id)
+            except ManifestValidationError as e:
+                # Report the invalid manifest next to the manifest file, instead of retrying the invocation
+                logger.error(f"Manifest Validation Failed: {e}")
+                s3_client.put_object(
+                    Bucket=bucket,
+                    Key=f"{manifest_key}.error",
+                    Body=json.dumps({"manifest": manifest_key, "versionId": version_id, "error": str(e)})
+                )
+                return {
+                    "statusCode": 400,
+                    "body": str(e)
+                }
+            data_file = "*"
+
         logger.info("Starting SageMaker Pipeline Execution ...")
         sm_client = boto3.client("sagemaker")
         response = sm_client.start_pipeline_execution(
@@ -37,7 +112,7 @@ def lambda_handler(event, context):
                 },
                 {
                     "Name": "DataFile",
-                    "Value": key.split("/")[-1]
+                    "Value": data_file
                 }
             ]
         )
@@ -1,14 +1,16 @@
 """ Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved. """
 """ SPDX-License-Identifier: MIT-0 """
 
+import os
+import glob
 import boto3
 import constants
 import aws_cdk as cdk
 import aws_cdk.aws_sagemaker as _sagemaker
 import aws_cdk.aws_iam as _iam
 
+from components.cache import get_lookup_value, get_cached_definition
 from components.endpoint import Endpoint
-from components.pipeline.workflow import get_sagemaker_pipeline
 from botocore.exceptions import ClientError
 from constructs import Construct
 
@@ -18,7 +20,7 @@ class Pipeline(Construct):
         super().__init__(scope, id, **kwargs)
 
         # Get the SageMaker Execution Role for the Domain
-        workflow_role_arn = self._get_execution_role()
+        workflow_role_arn = get_lookup_value(self, "execution_role_arn", self._get_execution_role)
         self.workflow_role = _iam.Role.from_role_arn(
             self,
             "WorkflowRole",
@@ -43,14 +45,30 @@ class Pipeline(Construct):
             )
         )
 
-        # Get the SageMaker Pipeline definition
-        sagemaker_pipeline = get_sagemaker_pipeline(
-            role=self.workflow_role.role_arn,
-            # default_bucket=bucket.solution_bucket.bucket_name,
-            lambda_arn=endpoint.function.function_arn,
-            evaluation_threshold=constants.PERFORMANCE_THRESHOLD,
-            model_package_group_name=f"{constants.WORKLOAD_NAME}PackageGroup"
-        )
+        # Get the SageMaker Pipeline definition, using a placeholder for the endpoint function ARN token
+        # so that the definition can be cached, and only regenerated when the workflow code changes
+        default_bucket = get_lookup_value(self, "default_bucket", self._get_default_bucket)
+        self.default_bucket = default_bucket
+        definition_parameters = {
+            "role": workflow_role_arn,
+            "default_bucket": default_bucket,
+            "lambda_arn": f"arn:aws:lambda:{constants.REGION}:000000000000:function:{constants.WORKLOAD_NAME}-EndpointFunction",
+            "evaluation_threshold": constants.PERFORMANCE_THRESHOLD,
+            "latency_threshold": constants.LATENCY_THRESHOLD,
+            "request_rate": constants.BENCHMARK_REQUEST_RATE,
+            "model_package_group_name": f"{constants.WORKLOAD_NAME}PackageGroup",
+            "segments": constants.SEGMENTS
+        }
+        pipeline_definition = get_cached_definition(
+            self,
+            source_files=[
+                os.path.join(os.path.dirname(__file__), "workflow.py"),
+                os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), "constants.py"),
+                *glob.glob(os.path.join(os.path.dirname(__file__), "code", "*.py"))
+            ],
+            parameters=definition_parameters,
+            build=lambda: self._get_pipeline_definition(definition_parameters)
+        ).replace(definition_parameters["lambda_arn"], endpoint.function.function_arn)
 
         # Define the SageMaker Pipeline L1 construct
         self.automl_workflow = _sagemaker.CfnPipeline(
@@ -60,7 +78,7 @@ class Pipeline(Construct):
             role_arn=self.workflow_role.role_arn,
             pipeline_description=f"SageMaker AutoML Pipeline for {constants.WORKLOAD_NAME}",
             pipeline_definition={
-                "PipelineDefinitionBody": sagemaker_pipeline.definition()
+                "PipelineDefinitionBody": pipeline_definition
             },
             tags=[
                 cdk.CfnTag(
@@ -71,6 +89,21 @@ class Pipeline(Construct):
         )
 
 
+    @staticmethod
+    # Static method to generate the SageMaker Pipeline definition
+    def _get_pipeline_definition(parameters: dict) -> str:
+        # NOTE: The SageMaker SDK is only imported when the cached pipeline definition is out of date
+        from components.pipeline.workflow import get_sagemaker_pipeline
+        return get_sagemaker_pipeline(**parameters).definition()
+
+
+    @staticmethod
+    # Static method to get the default SageMaker bucket for the pipeline artifacts
+    def _get_default_bucket() -> str:
+        from components.pipeline.workflow import get_pipeline_session
+        return get_pipeline_session(region=constants.REGION).default_bucket()
+
+
     @staticmethod
     # Static method to get the SageMaker Execution Role for the SageMaker Studio Domain
     def _get_execution_role() -> str:
@@ -0,0 +1,243 @@
+""" Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved. """
+""" SPDX-License-Identifier: MIT-0 """
+
+import os
+import sys
+import json
+import time
+import uuid
+import random
+import pathlib
+import argparse
+import logging
+import boto3
+import numpy as np
+import pandas as pd
+
+from concurrent.futures import ThreadPoolExecutor
+from botocore.exceptions import ClientError, WaiterError
+
+logger = logging.getLogger()
+logger.setLevel(level=logging.INFO)
+logger.addHandler(logging.StreamHandler())
+processing_dir = os.environ.get("PROCESSING_DIR", "/opt/ml/processing")  # Overridden by the local pipeline runner
+sm_client = boto3.client("sagemaker")
+sm_runtime = boto3.client("sagemaker-runtime")
+s3_client = boto3.client("s3")
+
+
+def create_multi_model(model_names: list, segments: list, model_name: str) -> str:
+    # Combine the segment models into a temporary multi-model, the same way as the deployment function,
+    # so that the benchmark includes the on-demand model loading, and the shared instance
+    models = [sm_client.describe_model(ModelName=name) for name in model_names]
+    containers = [model.get("PrimaryContainer", model.get("Containers", [{}])[0]) for model in models]
+
+    # Apply the same checks as the deployment function, so that the pipeline fails before the models are registered
+    for name, model in zip(model_names, models):
+        if len(model.get("Containers", [])) > 1:
+            raise Exception(f"Model {name} is an inference pipeline, which cannot be hosted on a multi-model endpoint")
+    if len({container["Image"] for container in containers}) > 1:
+        raise Exception("Segment models use different inference images, and cannot be hosted on a single multi-model endpoint")
+    for name, container in zip(model_names, containers):
+        if container.get("Environment", {}) != containers[0].get("Environment", {}):
+            raise Exception(f"Model {name} uses a different container environment than model {model_names[0]}, and cannot be hosted on a single multi-model endpoint")
+    bucket = containers[0]["ModelDataUrl"].split("/")[2]
+    prefix = f"benchmark/{model_name}"
+    for segment, container in zip(segments, containers):
+        source_bucket, source_key = container["ModelDataUrl"][len("s3://"):].split("/", 1)
+        s3_client.copy(
+            CopySource={"Bucket": source_bucket, "Key": source_key},
+            Bucket=bucket,
+            Key=f"{prefix}/{segment}.tar.gz"
+        )
+    sm_client.create_model(
+        ModelName=model_name,
+        ExecutionRoleArn=models[0]["ExecutionRoleArn"],
+        PrimaryContainer={
+            "Image": containers[0]["Image"],
+            "Mode": "MultiModel",
+            "ModelDataUrl": f"s3://{bucket}/{prefix}/",
+            "Environment": containers[0].get("Environment", {})
+        }
+    )
+    return f"s3://{bucket}/{prefix}/"
+
+
+def delete_multi_model(model_name: str, model_data_url: str) -> None:
+    logger.info(f"Deleting Benchmark Multi-Model: {model_name}")
+    try:
+        sm_client.delete_model(ModelName=model_name)
+    except ClientError as e:
+        logger.warning(f"Unable to delete model: {e}")
+    if model_data_url:
+        bucket, prefix = model_data_url[len("s3://"):].split("/", 1)
+        for page in s3_client.get_paginator("list_objects_v2").paginate(Bucket=bucket, Prefix=prefix):
+            for item in page.get("Contents", []):
+                s3_client.delete_object(Bucket=bucket, Key=item["Key"])
+
+
+def create_endpoint(endpoint_name: str, model_name: str, endpoint_type: str, instance_type: str) -> None:
+    # Create a temporary endpoint, using the same variant configuration as the production endpoint
+    if endpoint_type == "SERVERLESS":
+        variant = {
+            "ModelName": model_name,
+            "VariantName": "AllTraffic",
+            "ServerlessConfig": {
+                "MemorySizeInMB": 4096,
+                "MaxConcurrency": 20
+            }
+        }
+    else:
+        variant = {
+            "InstanceType": instance_type,
+            "InitialVariantWeight": 1,
+            "InitialInstanceCount": 1,
+            "ModelName": model_name,
+            "VariantName": "AllTraffic"
+        }
+    sm_client.create_endpoint_config(EndpointConfigName=endpoint_name, ProductionVariants=[variant])
+    sm_client.create_endpoint(EndpointName=endpoint_name, EndpointConfigName=endpoint_name)
+    logger.info(f"Waiting for Benchmark Endpoint: {endpoint_name}")
+    try:
+        sm_client.get_waiter("endpoint_in_service").wait(
+            EndpointName=endpoint_name,
+            WaiterConfig={"Delay": 30, "MaxAttempts": 60}
+        )
+    except WaiterError as e:
+        failure_reason = e.last_response.get("FailureReason", e)
+        raise Exception(f"Benchmark endpoint {endpoint_name} failed to start: {failure_reason}")
+
+
+def check_multi_model(endpoint_name: str, payloads: dict) -> None:
+    # Fail clearly if the inference image can't load a segment model on demand, for example if it doesn't
+    # implement the multi-model contract, instead of reporting the failure as a high error rate
+    for segment, requests in payloads.items():
+        try:
+            sm_runtime.invoke_endpoint(
+                EndpointName=endpoint_name,
+                ContentType="text/csv",
+                Body=requests[0][1],
+                TargetModel=f"{segment}.tar.gz"
+            )["Body"].read()
+        except ClientError as e:
+            raise Exception(f"The model for segment {segment} could not be served by the multi-model endpoint: {e}")
+        logger.info(f"Loaded the model for segment {segment} on the multi-model endpoint")
+
+
+def delete_endpoint(endpoint_name: str) -> None:
+    # NOTE: The endpoint, or endpoint config, may not exist if the creation failed, so don't hide the original error
+    logger.info(f"Deleting Benchmark Endpoint: {endpoint_name}")
+    try:
+        sm_client.delete_endpoint(EndpointName=endpoint_name)
+    except ClientError as e:
+        logger.warning(f"Unable to delete endpoint: {e}")
+    try:
+        sm_client.delete_endpoint_config(EndpointConfigName=endpoint_name)
+    except ClientError as e:
+        logger.warning(f"Unable to delete endpoint config: {e}")
+
+
+def invoke(endpoint_name: str, segment: str, payload: str, scheduled: float) -> tuple:
+    # Measure the latency from the scheduled send time, to include any queueing delay once the client is saturated
+    request = {"EndpointName": endpoint_name, "ContentType": "text/csv", "Body": payload}
+    if segment:
+        request["TargetModel"] = f"{segment}.tar.gz"
+    try:
+        sm_runtime.invoke_endpoint(**request)["Body"].read()
+        return (time.perf_counter() - scheduled) * 1000, False
+    except Exception as e:
+        logger.debug(f"Request failed: {e}")
+        return (time.perf_counter() - scheduled) * 1000, True
+
+
+def replay(endpoint_name: str, payloads: list, request_rate: int) -> list:
+    # Send the `(segment, payload)` requests at a fixed rate, independent of the response latency
+    interval = 1.0 / request_rate
+    start = time.perf_counter()
+    futures = []
+    with ThreadPoolExecutor(max_workers=max(request_rate * 4, 4)) as executor:
+        for i, (segment, payload) in enumerate(payloads):
+            scheduled = start + i * interval
+            delay = scheduled - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            futures.append(executor.submit(invoke, endpoint_name, segment, payload, scheduled))
+    return [future.result() for future in futures]
+
+
+def save_report(results: list, output_dir: str) -> None:
+    # NOTE: Report the maximum latency if every request failed, to keep the report valid JSON
+    latencies = [latency for latency, error in results if not error] or [sys.float_info.max]
+    error_rate = sum(error for _, error in results) / len(results)
+    p50, p95, p99 = np.percentile(latencies, [50, 95, 99])
+    logger.info(f"Latency p50: {p50:.1f}ms, p95: {p95:.1f}ms, p99: {p99:.1f}ms, Error Rate: {error_rate:.4f}")
+    report_dict = {
+        "latency_metrics": {
+            "p50_latency_ms": {"value": float(p50)},
+            "p95_latency_ms": {"value": float(p95)},
+            "p99_latency_ms": {"value": float(p99)},
+            "error_rate": {"value": error_rate}
+        }
+    }
+    pathlib.Path(output_dir).mkdir(parents=True, exist_ok=True)
+    with open(os.path.join(output_dir, "benchmark_metrics.json"), "w") as f:
+        f.write(json.dumps(report_dict))
+
+
+if __name__ == "__main__":
+    logger.debug("Starting Benchmark ...")
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--model-name", type=str, default="")
+    parser.add_argument("--model-names", type=str, default="")
+    parser.add_argument("--segments", type=str, default="")
+    parser.add_argument("--endpoint-type", type=str, required=True)
+    parser.add_argument("--instance-type", type=str, required=True)
+    parser.add_argument("--request-rate", type=int, default=10)
+    parser.add_argument("--sample-size", type=int, default=500)
+    parser.add_argument("--warmup-size", type=int, default=50)
+    parser.add_argument("--skip-columns", type=int, default=0)
+    args = parser.parse_args()
+    segments = args.segments.split(",") if args.segments else [""]
+
+    # Sample the test dataset rows of each segment, without the passthrough identifier columns, as individual inference payloads
+    payloads = {}
+    for segment in segments:
+        x_test = pd.read_csv(os.path.join(processing_dir, "input/testing", segment, "x_test.csv"), header=None).iloc[:, args.skip_columns:]
+        sample = x_test.sample(n=min(args.sample_size, len(x_test)), replace=False)
+        payloads[segment] = [(segment, payload) for payload in sample.to_csv(header=False, index=False).splitlines()]
+
+    # Interleave the segment requests, as the production multi-model endpoint serves all segments at the same time
+    warmup = [request for segment in segments for request in payloads[segment][:args.warmup_size]]
+    requests = [request for segment in segments for request in payloads[segment]]
+    random.shuffle(requests)
+
+    endpoint_name = f"benchmark-{uuid.uuid4().hex[:16]}"
+    model_name = args.model_name
+    model_data_url = None
+    try:
+        if args.segments:
+            logger.info("Creating Benchmark Multi-Model")
+            model_name = endpoint_name
+            model_data_url = create_multi_model(args.model_names.split(","), segments, model_name)
+        create_endpoint(endpoint_name, model_name, args.endpoint_type, args.instance_type)
+        if args.segments:
+            check_multi_model(endpoint_name, payloads)
+
+        # Warm up the endpoint, so that the cold start, and model loading, latencies are excluded from the benchmark
+        logger.info(f"Warming up the endpoint with {len(warmup)} requests")
+        replay(endpoint_name, warmup, args.request_rate)
+        logger.info(f"Replaying {len(requests)} requests at {args.request_rate} requests per second")
+        results = replay(endpoint_name, requests, args.request_rate)
+    finally:
+        delete_endpoint(endpoint_name)
+        if args.segments:
+            delete_multi_model(model_name, model_data_url)
+
+    # Save a benchmark report for each segment, measured on the shared endpoint
+    logger.info("Saving Benchmark Report")
+    for segment in segments:
+        logger.info(f"Segment: {segment or 'All'}")
+        save_report(
+            [result for (request_segment, _), result in zip(requests, results) if request_segment == segment],
+            os.path.join(processing_dir, "benchmark", segment)
+        )
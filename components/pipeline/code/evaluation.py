@@ -11,14 +11,16 @@ from sklearn.metrics import f1_score
 logger = logging.getLogger()
 logger.setLevel(level=logging.INFO)
 logger.addHandler(logging.StreamHandler())
+processing_dir = os.environ.get("PROCESSING_DIR", "/opt/ml/processing")  # Overridden by the local pipeline runner
 
 if __name__ == "__main__":
     logger.debug("Starting Evaluation ...")
     logger.info("Reading Test Predictions")
-    y_pred_path = "/opt/ml/processing/input/predictions/x_test.csv.out"
-    y_pred = pd.read_csv(y_pred_path, header=None)
+    y_pred_path = os.path.join(processing_dir, "input/predictions/x_test.csv.out")
+    # NOTE: The prediction is the last column, when the predictions are joined with the identifier
+    y_pred = pd.read_csv(y_pred_path, header=None).iloc[:, -1]
     logger.info("Reading Test Labels")
-    y_true_path = "/opt/ml/processing/input/true_labels/y_test.csv"
+    y_true_path = os.path.join(processing_dir, "input/true_labels/y_test.csv")
     y_true = pd.read_csv(y_true_path, header=None)
     score = f1_score(y_true, y_pred, average="weighted")
     logger.info(f"F1 Score: {score}")
@@ -30,7 +32,14 @@ if __name__ == "__main__":
             },
         },
     }
-    output_dir = "/opt/ml/processing/evaluation"
+
+    # Add the endpoint latency metrics from the benchmark report
+    benchmark_path = os.path.join(processing_dir, "input/benchmark/benchmark_metrics.json")
+    if os.path.exists(benchmark_path):
+        logger.info("Reading Benchmark Report")
+        with open(benchmark_path, "r") as f:
+            report_dict.update(json.load(f))
+    output_dir = os.path.join(processing_dir, "evaluation")
     pathlib.Path(output_dir).mkdir(parents=True, exist_ok=True)
     evaluation_path = os.path.join(output_dir, "evaluation_metrics.json")
     logger.info("Saving Evaluation Report")
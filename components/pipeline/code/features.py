@@ -0,0 +1,28 @@
+""" Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved. """
+""" SPDX-License-Identifier: MIT-0 """
+
+import os
+import json
+import logging
+import boto3
+
+logger = logging.getLogger()
+logger.setLevel(level=logging.INFO)
+logger.addHandler(logging.StreamHandler())
+processing_dir = os.environ.get("PROCESSING_DIR", "/opt/ml/processing")  # Overridden by the local pipeline runner
+feature_table = os.environ["FEATURE_TABLE"]
+id_attribute = os.environ["ID_ATTRIBUTE"]
+
+if __name__ == "__main__":
+    logger.debug("Starting Online Feature Update ...")
+
+    # Update the online feature store with the latest feature rows of the preprocessing step,
+    # only once the model trained on the same encoded columns has passed the quality conditions
+    count = 0
+    table = boto3.resource("dynamodb").Table(feature_table)
+    with open(os.path.join(processing_dir, "input", "features", "features.jsonl"), "r") as f:
+        with table.batch_writer(overwrite_by_pkeys=[id_attribute]) as batch:
+            for line in f:
+                batch.put_item(Item=json.loads(line))
+                count += 1
+    logger.info(f"Saved online features for {count} players")
@@ -2,53 +2,139 @@
 """ SPDX-License-Identifier: MIT-0 """
 
 import os
+import glob
+import json
 import pathlib
 import argparse
 import logging
 import pandas as pd
 
+from concurrent.futures import ThreadPoolExecutor
 from sklearn.model_selection import train_test_split
 
 logger = logging.getLogger()
 logger.setLevel(level=logging.INFO)
 logger.addHandler(logging.StreamHandler())
-training_output_dir = "/opt/ml/processing/output/training"
+processing_dir = os.environ.get("PROCESSING_DIR", "/opt/ml/processing")  # Overridden by the local pipeline runner
+training_output_dir = os.path.join(processing_dir, "output/training")
+testing_output_dir = os.path.join(processing_dir, "output/testing")
+features_output_dir = os.path.join(processing_dir, "output/features")
 target_attribute = os.environ["TARGET_ATTRIBUTE"]
+segment_attribute = os.environ.get("SEGMENT_ATTRIBUTE", "")
+id_attribute = os.environ.get("ID_ATTRIBUTE", "")
+date_attribute = os.environ.get("DATE_ATTRIBUTE", "")
+date_format = os.environ.get("DATE_FORMAT", "%Y_%m_%d")
+launch_date = os.environ.get("LAUNCH_DATE", "")
+categorical_attributes = [name for name in os.environ.get("CATEGORICAL_ATTRIBUTES", "").split(",") if name]
+
+
+def encode_features(df: pd.DataFrame, segmented: bool = False) -> pd.DataFrame:
+    # Expand the date attribute into the seasonal, and game age, numeric features
+    if date_attribute:
+        dates = pd.to_datetime(df[date_attribute], format=date_format)
+        if launch_date:
+            launch = pd.to_datetime(launch_date, format=date_format)
+        else:
+            # NOTE: The earliest date changes between datasets, so the feature is not comparable across models
+            launch = dates.min()
+            logger.warning(f"LAUNCH_DATE is not set, using the earliest {date_attribute} of the dataset as the launch date")
+        logger.info(f"Encoding {date_attribute}, using launch date: {launch.date()}")
+        date_features = pd.DataFrame(
+            {
+                f"{date_attribute}_day_of_year": dates.dt.dayofyear,
+                f"{date_attribute}_days_since_launch": (dates - launch).dt.days
+            },
+            index=df.index
+        )
+        df = pd.concat([df.drop(columns=[date_attribute]), date_features], axis=1)
+
+    # One-hot encode the categorical attributes, keeping the segment attribute when it is used to split the dataset
+    columns = [name for name in categorical_attributes if not (segmented and name == segment_attribute)]
+    if columns:
+        logger.info(f"One-hot encoding: {', '.join(columns)}")
+        df = pd.get_dummies(df, columns=columns, dtype=int)
+    return df
+
+
+def save_datasets(df: pd.DataFrame, column_names: list, segment: str = "") -> None:
+    # Split the data (80/20)
+    train, test = train_test_split(df, test_size=0.2)
+
+    # Save training data files, without the identifier attribute
+    training_dir = os.path.join(training_output_dir, segment)
+    pathlib.Path(training_dir).mkdir(parents=True, exist_ok=True)
+    train.to_csv(os.path.join(training_dir, "train_val.csv"), index=False, columns=[name for name in column_names if name != id_attribute])
+
+    # Save Testing file (dropping target column, and keeping the identifier as the first column to join the predictions), and ground truth labels
+    testing_dir = os.path.join(testing_output_dir, segment)
+    pathlib.Path(testing_dir).mkdir(parents=True, exist_ok=True)
+    test.to_csv(os.path.join(testing_dir, "x_test.csv"), index=False, header=False, columns=[name for name in column_names if name != target_attribute])
+    test.to_csv(os.path.join(testing_dir, "y_test.csv"), header=False, index=False, columns=[target_attribute])
+
+
+def save_online_features(df: pd.DataFrame, feature_columns: list, segmented: bool = False) -> None:
+    # Keep only the latest (last) record for each player, as a compact CSV feature row
+    # NOTE: The online feature store is only updated by the `OnlineFeatureStep`, once the model has passed the quality conditions
+    latest = df.drop_duplicates(subset=[id_attribute], keep="last")
+    rows = latest[feature_columns].to_csv(header=False, index=False).splitlines()
+    segments = latest[segment_attribute].astype(str) if segmented else [""] * len(latest)
+    pathlib.Path(features_output_dir).mkdir(parents=True, exist_ok=True)
+    with open(os.path.join(features_output_dir, "features.jsonl"), "w") as f:
+        for player_id, segment, row in zip(latest[id_attribute].astype(str), segments, rows):
+            item = {id_attribute: player_id, "features": row}
+            if segment:
+                item["segment"] = segment
+            f.write(json.dumps(item) + "\n")
+    logger.info(f"Saved online features for {len(rows)} players")
 
 
 if __name__ == "__main__":
     logger.debug("Starting Preprocessing ...")
     parser = argparse.ArgumentParser()
     parser.add_argument("--input-file", type=str, required=True)
+    parser.add_argument("--segments", type=str, default="")
     args = parser.parse_args()
     logger.info(f"Reading File: {args.input_file}")
 
-    # Read csv as pandas DataFrame
-    input_data_path = os.path.join("/opt/ml/processing/input", args.input_file)
-    df = pd.read_csv(input_data_path)
+    # Read csv files, or multi-part dataset files, in parallel as a single pandas DataFrame
+    input_data_paths = sorted(
+        path for path in glob.glob(os.path.join(processing_dir, "input", "**", args.input_file), recursive=True)
+        if os.path.isfile(path)
+    )
+    logger.info(f"Reading {len(input_data_paths)} Dataset Files")
+    with ThreadPoolExecutor(max_workers=os.cpu_count()) as executor:
+        df = pd.concat(executor.map(pd.read_csv, input_data_paths), ignore_index=True)
+
+    # Order the records by date, keeping the file order for the same date, so that the last record of a player is the latest
+    if date_attribute:
+        df = df.sort_values(date_attribute, key=lambda dates: pd.to_datetime(dates, format=date_format), kind="stable", ignore_index=True)
     
+    # Encode the date, and categorical attributes as numeric features
+    df = encode_features(df, segmented=bool(args.segments))
+
     # Capture headings
     headers = list(df.columns.values)
     
-    # remove the target attribute from the list
+    # remove the target, and identifier attributes from the list
     headers.pop(headers.index(target_attribute))
-    column_names = headers + [target_attribute]
+    if id_attribute:
+        headers.pop(headers.index(id_attribute))
+    column_names = ([id_attribute] if id_attribute else []) + headers + [target_attribute]
 
-    # Create a new DataFrame with the target attribute as the last column
+    # Create a new DataFrame with the identifier as the first column, and the target attribute as the last column
     df = df[column_names]
     logger.debug("Shape of the data is:", df.shape)
 
-    # Split the data (80/20)
-    train, test = train_test_split(df, test_size=0.2)
-
-    # Save training data files 
-    pathlib.Path(training_output_dir).mkdir(parents=True, exist_ok=True)
-    train.to_csv(os.path.join(training_output_dir, "train_val.csv"), index=False)
-
-    # Save Testing file (dropping target column), and ground truth labels
-    testing_output_dir = "/opt/ml/processing/output/testing"
-    pathlib.Path(testing_output_dir).mkdir(parents=True, exist_ok=True)
-    test.to_csv(os.path.join(testing_output_dir, "x_test.csv"), index=False, header=False, columns=[name for name in column_names if name != target_attribute])
-    test.to_csv(os.path.join(testing_output_dir, "y_test.csv"), header=False, index=False, columns=[target_attribute])
+    if args.segments:
+        # Save a separate training and testing dataset for each segment of the `SEGMENT_ATTRIBUTE`
+        for segment in args.segments.split(","):
+            logger.info(f"Creating Files for Segment: {segment}")
+            save_datasets(df[df[segment_attribute] == segment], column_names, segment=segment)
+    else:
+        save_datasets(df, column_names)
     logger.info("Files successfully created")
-    logger.info("Completed running the processing job")
\ No newline at end of file
+
+    # Save the latest features of each player, with the same feature columns used for inference, for the online feature store
+    if id_attribute:
+        save_online_features(df, headers, segmented=bool(args.segments))
+    logger.info("Completed running the processing job")
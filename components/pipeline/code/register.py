@@ -0,0 +1,63 @@
+""" Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved. """
+""" SPDX-License-Identifier: MIT-0 """
+
+import os
+import argparse
+import logging
+import boto3
+
+logger = logging.getLogger()
+logger.setLevel(level=logging.INFO)
+logger.addHandler(logging.StreamHandler())
+sm_client = boto3.client("sagemaker")
+
+if __name__ == "__main__":
+    logger.debug("Starting Model Registration ...")
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--model-name", type=str, required=True)
+    parser.add_argument("--model-package-group", type=str, required=True)
+    parser.add_argument("--approval-status", type=str, required=True)
+    parser.add_argument("--instance-type", type=str, required=True)
+    parser.add_argument("--automl-job-name", type=str, required=True)
+    parser.add_argument("--training-job-name", type=str, required=True)
+    parser.add_argument("--evaluation-uri", type=str, required=True)
+    args = parser.parse_args()
+
+    # Register the fast retrained model, keeping the AutoML job, and training job for the next fast retrain
+    container = sm_client.describe_model(ModelName=args.model_name)["PrimaryContainer"]
+    response = sm_client.create_model_package(
+        ModelPackageGroupName=args.model_package_group,
+        ModelApprovalStatus=args.approval_status,
+        InferenceSpecification={
+            "Containers": [
+                {
+                    "Image": container["Image"],
+                    "ModelDataUrl": container["ModelDataUrl"],
+                    "Environment": container.get("Environment", {})
+                }
+            ],
+            "SupportedContentTypes": ["text/csv"],
+            "SupportedResponseMIMETypes": ["text/csv"],
+            "SupportedRealtimeInferenceInstanceTypes": [args.instance_type],
+            "SupportedTransformInstanceTypes": [args.instance_type]
+        },
+        ModelMetrics={
+            "ModelQuality": {
+                "Statistics": {
+                    "ContentType": "application/json",
+                    "S3Uri": args.evaluation_uri
+                }
+            }
+        },
+        CustomerMetadataProperties={
+            "AutoMLJobName": args.automl_job_name,
+            "TrainingJobName": args.training_job_name
+        },
+        Tags=[
+            {
+                "Key": "WorkloadName",
+                "Value": os.environ["WORKLOAD_NAME"]
+            }
+        ]
+    )
+    logger.info(f"Model Package: {response['ModelPackageArn']}")
@@ -0,0 +1,225 @@
+""" Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved. """
+""" SPDX-License-Identifier: MIT-0 """
+
+import os
+import io
+import json
+import time
+import uuid
+import pathlib
+import argparse
+import logging
+import datetime
+import boto3
+import pandas as pd
+
+from sklearn.model_selection import train_test_split
+
+logger = logging.getLogger()
+logger.setLevel(level=logging.INFO)
+logger.addHandler(logging.StreamHandler())
+processing_dir = os.environ.get("PROCESSING_DIR", "/opt/ml/processing")  # Overridden by the local pipeline runner
+workload_name = os.environ["WORKLOAD_NAME"]
+sm_client = boto3.client("sagemaker")
+s3_client = boto3.client("s3")
+
+
+def get_latest_package(model_package_group: str) -> dict:
+    # Get the latest approved model package, if any
+    packages = sm_client.list_model_packages(
+        ModelPackageGroupName=model_package_group,
+        ModelApprovalStatus="Approved",
+        SortBy="CreationTime",
+        SortOrder="Descending",
+        MaxResults=1
+    )["ModelPackageSummaryList"]
+    if not packages:
+        return None
+    return sm_client.describe_model_package(ModelPackageName=packages[0]["ModelPackageArn"])
+
+
+def fast_retrain_failed(pipeline_name: str, failure_step: str, step_suffix: str) -> bool:
+    # Check if the previous pipeline execution failed the quality gate for the fast retrained model,
+    # or if any step of the fast retrain branch failed, or was stopped, for example a failed benchmark endpoint
+    executions = sm_client.list_pipeline_executions(
+        PipelineName=pipeline_name,
+        SortBy="CreationTime",
+        SortOrder="Descending",
+        MaxResults=10
+    )["PipelineExecutionSummaries"]
+    previous = [execution for execution in executions if execution["PipelineExecutionStatus"] != "Executing"]
+    if not previous:
+        return False
+    steps = sm_client.list_pipeline_execution_steps(
+        PipelineExecutionArn=previous[0]["PipelineExecutionArn"]
+    )["PipelineExecutionSteps"]
+    return any(
+        step["StepName"] == failure_step
+        or (step["StepName"].endswith(step_suffix) and step.get("StepStatus") in ["Failed", "Stopped"])
+        for step in steps
+    )
+
+
+def get_retrain_mode(args: argparse.Namespace, package: dict, automl_job: dict) -> str:
+    if args.retrain_mode == "FULL":
+        return "FULL"
+    if package is None or automl_job is None:
+        logger.info("No approved model package from a previous AutoML job")
+        return "FULL"
+    if args.retrain_mode == "FAST":
+        return "FAST"
+    age = datetime.datetime.now(datetime.timezone.utc) - automl_job["CreationTime"]
+    if age.days >= args.full_retrain_interval:
+        logger.info(f"Last full AutoML job was {age.days} days ago")
+        return "FULL"
+    if fast_retrain_failed(args.pipeline_name, args.failure_step, args.step_suffix):
+        logger.info("Previous fast retrained model failed the quality gate, or the fast retrain failed")
+        return "FULL"
+    return "FAST"
+
+
+def upload_datasets(training_uri: str, output_uri: str) -> dict:
+    # Split the new training data into the training, and validation channels
+    bucket, key = training_uri[len("s3://"):].split("/", 1)
+    body = s3_client.get_object(Bucket=bucket, Key=f"{key.rstrip('/')}/train_val.csv")["Body"].read()
+    train, validation = train_test_split(pd.read_csv(io.BytesIO(body)), test_size=0.2)
+    channels = {}
+    for name, df in [("train", train), ("validation", validation)]:
+        bucket, key = f"{output_uri}/data/{name}/{name}.csv"[len("s3://"):].split("/", 1)
+        s3_client.put_object(Bucket=bucket, Key=key, Body=df.to_csv(index=False).encode("utf-8"))
+        channels[name] = f"{output_uri}/data/{name}/"
+    return channels
+
+
+def get_input_data_config(candidate: dict, channels: dict) -> list:
+    # Point each channel at the new data, resetting the data source fields that are not valid for an `S3Prefix`
+    input_data_config = []
+    for channel in candidate["InputDataConfig"]:
+        data_source = channel["DataSource"]["S3DataSource"]
+        input_data_config.append({
+            **{key: value for key, value in channel.items() if key in ["ChannelName", "ContentType", "CompressionType", "RecordWrapperType", "InputMode"]},
+            "DataSource": {
+                "S3DataSource": {
+                    "S3DataType": "S3Prefix",
+                    "S3Uri": channels.get(channel["ChannelName"], channels["train"]),
+                    "S3DataDistributionType": data_source.get("S3DataDistributionType", "FullyReplicated")
+                }
+            }
+        })
+    return input_data_config
+
+
+def get_network_config(candidate: dict) -> dict:
+    # Keep the network configuration of the candidate training job
+    return {
+        key: candidate[key] for key in ["VpcConfig", "EnableNetworkIsolation", "EnableInterContainerTrafficEncryption"]
+        if key in candidate
+    }
+
+
+def retrain(package: dict, training_job_name: str, channels: dict, output_uri: str) -> dict:
+    # Retrain the best candidate algorithm, and hyperparameters, with a plain training job
+    # NOTE: A pipeline `TrainingStep` can't be used, since the image, and hyperparameters, of the best candidate are only
+    # known at execution time, and a failed fast retrain must fall back to a full AutoML job, instead of failing the pipeline.
+    # The processing job waits on the training job instead, for up to 12 hours.
+    candidate = sm_client.describe_training_job(TrainingJobName=training_job_name)
+    # NOTE: Training job, and model names are limited to 63 characters
+    job_name = f"{workload_name[:26]}-FastRetrain-{time.strftime('%Y%m%d-%H%M%S', time.gmtime())}-{uuid.uuid4().hex[:8]}"
+    tags = [
+        {
+            "Key": "WorkloadName",
+            "Value": workload_name
+        }
+    ]
+
+    network_args = get_network_config(candidate)
+    logger.info(f"Starting Training Job: {job_name}")
+    sm_client.create_training_job(
+        TrainingJobName=job_name,
+        AlgorithmSpecification={
+            "TrainingImage": candidate["AlgorithmSpecification"]["TrainingImage"],
+            "TrainingInputMode": candidate["AlgorithmSpecification"]["TrainingInputMode"]
+        },
+        HyperParameters=candidate.get("HyperParameters", {}),
+        Environment=candidate.get("Environment", {}),
+        RoleArn=candidate["RoleArn"],
+        InputDataConfig=get_input_data_config(candidate, channels),
+        OutputDataConfig={"S3OutputPath": f"{output_uri}/model"},
+        ResourceConfig=candidate["ResourceConfig"],
+        StoppingCondition=candidate["StoppingCondition"],
+        Tags=tags,
+        **network_args
+    )
+    sm_client.get_waiter("training_job_completed_or_stopped").wait(
+        TrainingJobName=job_name,
+        WaiterConfig={"Delay": 60, "MaxAttempts": 720}
+    )
+    job = sm_client.describe_training_job(TrainingJobName=job_name)
+    if job["TrainingJobStatus"] != "Completed":
+        raise Exception(f"Training Job {job_name} {job['TrainingJobStatus']}: {job.get('FailureReason', '')}")
+
+    # Create the model, using the inference container of the approved model package
+    container = package["InferenceSpecification"]["Containers"][0]
+    sm_client.create_model(
+        ModelName=job_name,
+        ExecutionRoleArn=candidate["RoleArn"],
+        PrimaryContainer={
+            "Image": container["Image"],
+            "ModelDataUrl": job["ModelArtifacts"]["S3ModelArtifacts"],
+            "Environment": container.get("Environment", {})
+        },
+        Tags=tags,
+        **{key: network_args[key] for key in ["VpcConfig", "EnableNetworkIsolation"] if key in network_args}
+    )
+    return {"model_name": job_name, "training_job_name": job_name}
+
+
+def get_report(args: argparse.Namespace) -> dict:
+    # Find the AutoML job, and best candidate training job, of the latest approved model package
+    package = get_latest_package(args.model_package_group)
+    metadata = package.get("CustomerMetadataProperties", {}) if package else {}
+    automl_job = None
+    if "AutoMLJobName" in metadata:
+        automl_job = sm_client.describe_auto_ml_job(AutoMLJobName=metadata["AutoMLJobName"])
+    report_dict = {
+        "mode": get_retrain_mode(args, package, automl_job),
+        "model_name": "",
+        "automl_job_name": metadata.get("AutoMLJobName", ""),
+        "training_job_name": ""
+    }
+    logger.info(f"Retrain Mode: {report_dict['mode']}")
+
+    if report_dict["mode"] == "FAST":
+        # Fall back to a full AutoML job in the same execution if the fast retrain fails, instead of failing the pipeline
+        try:
+            training_job_name = metadata.get("TrainingJobName") or next(
+                step["CandidateStepName"] for step in automl_job["BestCandidate"]["CandidateSteps"]
+                if step["CandidateStepType"] == "AWS::SageMaker::TrainingJob"
+            )
+            channels = upload_datasets(args.training_uri, args.output_uri)
+            report_dict.update(retrain(package, training_job_name, channels, args.output_uri))
+        except Exception as e:
+            logger.error(f"Fast retrain failed, running a full AutoML job instead: {e}")
+            report_dict.update({"mode": "FULL", "model_name": "", "training_job_name": ""})
+    return report_dict
+
+
+if __name__ == "__main__":
+    logger.debug("Starting Fast Retrain ...")
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--model-package-group", type=str, required=True)
+    parser.add_argument("--pipeline-name", type=str, required=True)
+    parser.add_argument("--failure-step", type=str, required=True)
+    parser.add_argument("--step-suffix", type=str, default="-FastRetrain")
+    parser.add_argument("--training-uri", type=str, required=True)
+    parser.add_argument("--output-uri", type=str, required=True)
+    parser.add_argument("--full-retrain-interval", type=int, default=7)
+    parser.add_argument("--retrain-mode", type=str, default="AUTO")
+    args = parser.parse_args()
+    report_dict = get_report(args)
+
+    output_dir = os.path.join(processing_dir, "retrain")
+    pathlib.Path(output_dir).mkdir(parents=True, exist_ok=True)
+    logger.info("Saving Retrain Report")
+    with open(os.path.join(output_dir, "retrain.json"), "w") as f:
+        f.write(json.dumps(report_dict))
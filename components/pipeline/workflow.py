@@ -19,21 +19,23 @@ from sagemaker.workflow.pipeline_context import PipelineSession
 from sagemaker.workflow.properties import PropertyFile
 from sagemaker.workflow.model_step import ModelStep
 from sagemaker.workflow.functions import Join, JsonGet
+from sagemaker.workflow.execution_variables import ExecutionVariables
 from sagemaker.workflow.steps import ProcessingStep, TransformStep
 from sagemaker.workflow.automl_step import AutoMLStep
-from sagemaker.workflow.conditions import ConditionGreaterThanOrEqualTo
+from sagemaker.workflow.conditions import ConditionEquals, ConditionGreaterThanOrEqualTo, ConditionLessThanOrEqualTo
 from sagemaker.workflow.condition_step import ConditionStep
 from sagemaker.workflow.lambda_step import LambdaStep, LambdaOutput, LambdaOutputTypeEnum
 from sagemaker.workflow.fail_step import FailStep
 from sagemaker.lambda_helper import Lambda
 
 
-def get_pipeline_session(region: str) -> None:
+def get_pipeline_session(region: str, default_bucket: str = None) -> None:
     boto_session = boto3.Session(region_name=region)
     sagemaker_client = boto_session.client("sagemaker")
     return PipelineSession(
         boto_session=boto_session,
-        sagemaker_client=sagemaker_client
+        sagemaker_client=sagemaker_client,
+        default_bucket=default_bucket
     )
 
 
@@ -41,13 +43,23 @@ def get_sagemaker_pipeline(
     role: str,
     lambda_arn: str,
     model_package_group_name: str,
-    evaluation_threshold: float
+    evaluation_threshold: float,
+    latency_threshold: float,
+    request_rate: int,
+    segments: list = None,
+    default_bucket: str = None
 ) -> None:
 
     # SageMaker session variables
     if role is None:
         raise("Execution Role is Required")
-    pipeline_session = get_pipeline_session(region=constants.REGION)
+    if segments and constants.ENDPOINT_TYPE != "HOSTED":
+        raise Exception("Per-segment models require a multi-model endpoint. Please specify 'HOSTED' as the ENDPOINT_TYPE")
+    if constants.DATE_ATTRIBUTE and not constants.LAUNCH_DATE:
+        raise Exception("The days since launch feature requires a fixed launch date. Please specify the LAUNCH_DATE, or remove the DATE_ATTRIBUTE")
+    if segments and constants.FAST_RETRAIN:
+        raise Exception("Fast retrain is only supported for a single model. Please remove the SEGMENTS, or disable FAST_RETRAIN")
+    pipeline_session = get_pipeline_session(region=constants.REGION, default_bucket=default_bucket)
 
     # Pipeline variables
     execution_version = ParameterString(name="ExecutionVersion", default_value="Test")
@@ -56,9 +68,13 @@ def get_sagemaker_pipeline(
     max_runtime = ParameterInteger(name="MaxAutoMLRuntime", default_value=7200)  # max. AutoML training runtime: 2 hours
     model_approval_status = ParameterString(name="ModelApprovalStatus", default_value="Approved")
     metric_threshold = ParameterFloat(name="ModelRegistrationMetricThreshold", default_value=evaluation_threshold)
+    p99_threshold = ParameterFloat(name="LatencyThreshold", default_value=latency_threshold)  # max. p99 latency in milliseconds
+    error_rate_threshold = ParameterFloat(name="ErrorRateThreshold", default_value=0.01)
+    benchmark_rate = ParameterInteger(name="BenchmarkRequestRate", default_value=request_rate)  # benchmark requests per second
     data_uri = ParameterString(name="DataUri", default_value=f"s3://{pipeline_session.default_bucket()}/features.csv")
     data_file = ParameterString(name="DataFile", default_value="features.csv")
-    evaluation_report = PropertyFile(name="evaluation", output_name="evaluation_metrics", path="evaluation_metrics.json")
+    retrain_mode = ParameterString(name="RetrainMode", default_value="AUTO")  # AUTO | FAST | FULL
+    full_retrain_interval = ParameterInteger(name="FullRetrainIntervalDays", default_value=constants.FULL_RETRAIN_INTERVAL_DAYS)
 
     # Data preprocessing step
     preprocessor = SKLearnProcessor(
@@ -69,7 +85,14 @@ def get_sagemaker_pipeline(
         sagemaker_session=pipeline_session,
         base_job_name=f"{constants.WORKLOAD_NAME}/preprocessing",
         env={
-            "TARGET_ATTRIBUTE": constants.TARGET_ATTRIBUTE
+            "TARGET_ATTRIBUTE": constants.TARGET_ATTRIBUTE,
+            "SEGMENT_ATTRIBUTE": constants.SEGMENT_ATTRIBUTE,
+            "ID_ATTRIBUTE": constants.ID_ATTRIBUTE,
+            "DATE_ATTRIBUTE": constants.DATE_ATTRIBUTE,
+            "DATE_FORMAT": constants.DATE_FORMAT,
+            "LAUNCH_DATE": constants.LAUNCH_DATE,
+            "CATEGORICAL_ATTRIBUTES": ",".join(constants.CATEGORICAL_ATTRIBUTES),
+            "AWS_DEFAULT_REGION": constants.REGION
         }
     )
     preprocessing_step = ProcessingStep(
@@ -79,7 +102,8 @@ def get_sagemaker_pipeline(
                 ProcessingInput(
                     input_name="data",
                     source=data_uri,
-                    destination="/opt/ml/processing/input"
+                    destination="/opt/ml/processing/input",
+                    s3_data_type="ManifestFile" if constants.MANIFEST_FILE else "S3Prefix"
                 )
             ],
             outputs=[
@@ -93,134 +117,333 @@ def get_sagemaker_pipeline(
                     source="/opt/ml/processing/output/testing",
                     destination=Join(on="/", values=["s3:/", pipeline_session.default_bucket(), constants.WORKLOAD_NAME, execution_version, "testing"])
                 )
-            ],
+            ] + ([
+                ProcessingOutput(
+                    output_name="features",
+                    source="/opt/ml/processing/output/features",
+                    destination=Join(on="/", values=["s3:/", pipeline_session.default_bucket(), constants.WORKLOAD_NAME, execution_version, "features"])
+                )
+            ] if constants.ID_ATTRIBUTE else []),
             code=os.path.join(os.path.dirname(__file__), "code/preprocessing.py"),
-            arguments=["--input-file", data_file]
+            arguments=["--input-file", data_file] + (["--segments", ",".join(segments)] if segments else [])
         )
     )
 
-    # AutoML training step
-    automl = AutoML(
-        role=role,
-        target_attribute_name=constants.TARGET_ATTRIBUTE,
-        sagemaker_session=pipeline_session,
-        total_job_runtime_in_seconds=max_runtime,
-        base_job_name=f"{constants.WORKLOAD_NAME}/training",
-        mode="ENSEMBLING"  # Only `ENSEMBLING` mode is supported for native AutoML step integration in SageMaker Pipelines
-    )
-    automl_step = AutoMLStep(
-        name="AutoMLTrainingStep",
-        step_args=automl.fit(
-            inputs=[
-                AutoMLInput(
-                    inputs=preprocessing_step.properties.ProcessingOutputConfig.Outputs["training"].S3Output.S3Uri,
-                    target_attribute_name=constants.TARGET_ATTRIBUTE,
-                    channel_type="training"
+    def get_feature_steps(suffix: str) -> list:
+        # Update the online feature store with the latest player features, after the model has passed the quality
+        # conditions, so that a rejected model never changes the encoded feature columns served to the deployed model
+        if not constants.ID_ATTRIBUTE:
+            return []
+        feature_updater = SKLearnProcessor(
+            role=role,
+            framework_version="1.0-1",
+            instance_count=1,
+            instance_type=instance_type,
+            base_job_name=f"{constants.WORKLOAD_NAME}/online-features",
+            sagemaker_session=pipeline_session,
+            env={
+                "FEATURE_TABLE": f"{constants.WORKLOAD_NAME}-Features",
+                "ID_ATTRIBUTE": constants.ID_ATTRIBUTE,
+                "AWS_DEFAULT_REGION": constants.REGION
+            }
+        )
+        return [
+            ProcessingStep(
+                name=f"OnlineFeatureStep{suffix}",
+                step_args=feature_updater.run(
+                    inputs=[
+                        ProcessingInput(
+                            source=preprocessing_step.properties.ProcessingOutputConfig.Outputs["features"].S3Output.S3Uri,
+                            destination="/opt/ml/processing/input/features"
+                        )
+                    ],
+                    code=os.path.join(os.path.dirname(__file__), "code/features.py")
                 )
-            ]
+            )
+        ]
+
+    def get_benchmark_step(suffix: str, testing_inputs: list, model_arguments: list) -> ProcessingStep:
+        # Benchmark the endpoint latency of the model, using a temporary endpoint
+        benchmarker = SKLearnProcessor(
+            role=role,
+            framework_version="1.0-1",
+            instance_count=1,
+            instance_type=instance_type,
+            base_job_name=f"{constants.WORKLOAD_NAME}/benchmark",
+            sagemaker_session=pipeline_session,
+            env={
+                "AWS_DEFAULT_REGION": constants.REGION
+            }
+        )
+        return ProcessingStep(
+            name=f"ModelBenchmarkStep{suffix}",
+            step_args=benchmarker.run(
+                inputs=testing_inputs,
+                outputs=[
+                    ProcessingOutput(
+                        output_name="benchmark_metrics",
+                        source="/opt/ml/processing/benchmark",
+                        destination=Join(on="/", values=["s3:/", pipeline_session.default_bucket(), constants.WORKLOAD_NAME, execution_version, f"benchmark{suffix}"])
+                    )
+                ],
+                code=os.path.join(os.path.dirname(__file__), "code/benchmark.py"),
+                arguments=model_arguments + [
+                    "--endpoint-type", "HOSTED" if segments else constants.ENDPOINT_TYPE,
+                    "--instance-type", instance_type,
+                    "--request-rate", benchmark_rate.to_string(),
+                    "--skip-columns", "1" if constants.ID_ATTRIBUTE else "0"
+                ]
+            )
         )
-    )
 
-    # Create SageMaker model from the best candidate
-    best_model = automl_step.get_best_auto_ml_model(
-        role=role,
-        sagemaker_session=pipeline_session
-    )
-    create_model_args = best_model.create(instance_type=instance_type)
-    model_step = ModelStep(
-        "ModelCreationStep",
-        step_args=create_model_args
-    )
+    def get_evaluation_steps(suffix: str, model_name, testing_uri, benchmark_uri) -> tuple:
+        # Batch inference, and evaluation steps for a model, with the quality conditions on the evaluation report
+        evaluation_report = PropertyFile(name=f"evaluation{suffix}", output_name="evaluation_metrics", path="evaluation_metrics.json")
 
-    # Run Batch Inference on the test dataset
-    # NOTE: Ensure `test` dataset is not larger than 6MB in size
-    batch_transformer = Transformer(
-        model_name=model_step.properties.ModelName,
-        instance_count=instance_count,
-        instance_type=instance_type,
-        base_transform_job_name=f"{constants.WORKLOAD_NAME}/batch-inference",
-        output_path=Join(on="/", values=["s3:/", pipeline_session.default_bucket(), constants.WORKLOAD_NAME, execution_version, "transform"]),
-        sagemaker_session=pipeline_session
-    )
-    batch_inference_step = TransformStep(
-        name="InferenceTestingStep",
-        step_args=batch_transformer.transform(
-            data=Join(
-                on="/",
-                values=[
-                    preprocessing_step.properties.ProcessingOutputConfig.Outputs["testing"].S3Output.S3Uri,
-                    "x_test.csv"
-                ]
+        # Run Batch Inference on the test dataset, excluding the identifier from the model input,
+        # and joining it with the prediction in the output
+        passthrough_args = {
+            "split_type": "Line",
+            "input_filter": "$[1:]",
+            "join_source": "Input",
+            "output_filter": "$[0,-1]"
+        } if constants.ID_ATTRIBUTE else {}
+        # NOTE: Ensure `test` dataset is not larger than 6MB in size
+        batch_transformer = Transformer(
+            model_name=model_name,
+            instance_count=instance_count,
+            instance_type=instance_type,
+            base_transform_job_name=f"{constants.WORKLOAD_NAME}/batch-inference",
+            assemble_with="Line" if constants.ID_ATTRIBUTE else None,
+            output_path=Join(on="/", values=["s3:/", pipeline_session.default_bucket(), constants.WORKLOAD_NAME, execution_version, f"transform{suffix}"]),
+            sagemaker_session=pipeline_session
+        )
+        batch_inference_step = TransformStep(
+            name=f"InferenceTestingStep{suffix}",
+            step_args=batch_transformer.transform(
+                data=Join(on="/", values=[testing_uri, "x_test.csv"]),
+                content_type="text/csv",
+                **passthrough_args
+            )
+        )
+
+        # Evaluate the inference testing results against ground truth data to get the F1 score, and latency metrics
+        evaluator = SKLearnProcessor(
+            role=role,
+            framework_version="1.0-1",
+            instance_count=instance_count,
+            instance_type=instance_type,
+            base_job_name=f"{constants.WORKLOAD_NAME}/evaluation",
+            sagemaker_session=pipeline_session
+        )
+        evaluation_step = ProcessingStep(
+            name=f"ModelEvaluationStep{suffix}",
+            step_args=evaluator.run(
+                inputs=[
+                    ProcessingInput(
+                        source=batch_inference_step.properties.TransformOutput.S3OutputPath,
+                        destination="/opt/ml/processing/input/predictions"
+                    ),
+                    ProcessingInput(
+                        source=Join(on="/", values=[testing_uri, "y_test.csv"]),
+                        destination="/opt/ml/processing/input/true_labels"
+                    ),
+                    ProcessingInput(
+                        source=benchmark_uri,
+                        destination="/opt/ml/processing/input/benchmark"
+                    )
+                ],
+                outputs=[
+                    ProcessingOutput(
+                        output_name="evaluation_metrics",
+                        source="/opt/ml/processing/evaluation",
+                        destination=Join(
+                            on="/",
+                            values=[
+                                "s3:/",
+                                pipeline_session.default_bucket(),
+                                constants.WORKLOAD_NAME,
+                                execution_version,
+                                f"evaluation{suffix}"
+                            ]
+                        )
+                    )
+                ],
+                code=os.path.join(os.path.dirname(__file__), "code/evaluation.py")
             ),
-            content_type="text/csv"
+            property_files=[evaluation_report]
         )
-    )
 
-    # Evaluate the inference testing results against ground truth data to get the F1 score
-    evaluator = SKLearnProcessor(
-        role=role,
-        framework_version="1.0-1",
-        instance_count=instance_count,
-        instance_type=instance_type,
-        base_job_name=f"{constants.WORKLOAD_NAME}/evaluation",
-        sagemaker_session=pipeline_session
-    )
-    evaluation_step = ProcessingStep(
-        name="ModelEvaluationStep",
-        step_args=evaluator.run(
-            inputs=[
-                ProcessingInput(
-                    source=batch_inference_step.properties.TransformOutput.S3OutputPath,
-                    destination="/opt/ml/processing/input/predictions"
+        # The model quality, and latency conditions for the model
+        conditions = [
+            ConditionGreaterThanOrEqualTo(
+                left=JsonGet(
+                    step_name=evaluation_step.name,
+                    property_file=evaluation_report,
+                    json_path="classification_metrics.weighted_f1.value"
+                ),
+                right=metric_threshold
+            ),
+            ConditionLessThanOrEqualTo(
+                left=JsonGet(
+                    step_name=evaluation_step.name,
+                    property_file=evaluation_report,
+                    json_path="latency_metrics.p99_latency_ms.value"
+                ),
+                right=p99_threshold
+            ),
+            ConditionLessThanOrEqualTo(
+                left=JsonGet(
+                    step_name=evaluation_step.name,
+                    property_file=evaluation_report,
+                    json_path="latency_metrics.error_rate.value"
                 ),
+                right=error_rate_threshold
+            )
+        ]
+        return [batch_inference_step, evaluation_step], conditions
+
+    # Train, evaluate, and register a model for each segment of the `SEGMENT_ATTRIBUTE`,
+    # or a single model for the entire dataset when no segments are specified
+    model_steps = []
+    branch_steps = []
+    register_steps = []
+    testing_uris = []
+    quality_conditions = []
+    for segment in segments or [None]:
+        suffix = f"-{segment}" if segment else ""
+        training_uri = preprocessing_step.properties.ProcessingOutputConfig.Outputs["training"].S3Output.S3Uri
+        testing_uri = preprocessing_step.properties.ProcessingOutputConfig.Outputs["testing"].S3Output.S3Uri
+        if segment:
+            training_uri = Join(on="/", values=[training_uri, segment])
+            testing_uri = Join(on="/", values=[testing_uri, segment])
+
+        # AutoML training step
+        automl = AutoML(
+            role=role,
+            target_attribute_name=constants.TARGET_ATTRIBUTE,
+            sagemaker_session=pipeline_session,
+            total_job_runtime_in_seconds=max_runtime,
+            base_job_name=f"{constants.WORKLOAD_NAME}/training",
+            mode="ENSEMBLING"  # Only `ENSEMBLING` mode is supported for native AutoML step integration in SageMaker Pipelines
+        )
+        automl_step = AutoMLStep(
+            name=f"AutoMLTrainingStep{suffix}",
+            step_args=automl.fit(
+                inputs=[
+                    AutoMLInput(
+                        inputs=training_uri,
+                        target_attribute_name=constants.TARGET_ATTRIBUTE,
+                        channel_type="training"
+                    )
+                ]
+            )
+        )
+
+        # Create SageMaker model from the best candidate
+        best_model = automl_step.get_best_auto_ml_model(
+            role=role,
+            sagemaker_session=pipeline_session
+        )
+        create_model_args = best_model.create(instance_type=instance_type)
+        model_step = ModelStep(
+            f"ModelCreationStep{suffix}",
+            step_args=create_model_args
+        )
+
+        # Create Registration Step
+        model_metrics = ModelMetrics(
+            model_statistics=MetricsSource(
+                s3_uri=automl_step.properties.BestCandidateProperties.ModelInsightsJsonReportPath,
+                content_type="application/json"
+            ),
+            explainability=MetricsSource(
+                s3_uri=automl_step.properties.BestCandidateProperties.ExplainabilityJsonReportPath,
+                content_type="application/json"
+            ),
+        )
+        step_register_model = ModelStep(
+            name=f"ModelRegistrationStep{suffix}",
+            step_args=best_model.register(
+                content_types=["text/csv"],
+                response_types=["text/csv"],
+                inference_instances=[instance_type],
+                transform_instances=[instance_type],
+                model_package_group_name=f"{model_package_group_name}{suffix}",
+                approval_status=model_approval_status,
+                model_metrics=model_metrics,
+                customer_metadata_properties={"AutoMLJobName": automl_step.properties.AutoMLJobName}  # Used by the fast retrain
+            )
+        )
+
+        model_steps.append(model_step)
+        register_steps.append(step_register_model)
+        testing_uris.append(testing_uri)
+        branch_steps.extend([automl_step, model_step])
+
+    if segments:
+        # Benchmark the segment models together on a temporary multi-model endpoint, routing each request with the
+        # segment as the `TargetModel`, the same way as the deployed endpoint, and report the latency of each segment
+        benchmark_step = get_benchmark_step(
+            "-MultiModel",
+            [
                 ProcessingInput(
-                    source=Join(
-                        on="/",
-                        values=[
-                            preprocessing_step.properties.ProcessingOutputConfig.Outputs["testing"].S3Output.S3Uri,
-                            "y_test.csv"
-                        ]
-                    ),
-                    destination="/opt/ml/processing/input/true_labels"
-                )
+                    source=Join(on="/", values=[testing_uri, "x_test.csv"]),
+                    destination=f"/opt/ml/processing/input/testing/{segment}"
+                ) for segment, testing_uri in zip(segments, testing_uris)
             ],
-            outputs=[
-                ProcessingOutput(
-                    output_name="evaluation_metrics",
-                    source="/opt/ml/processing/evaluation",
-                    destination=Join(
-                        on="/",
-                        values=[
-                            "s3:/",
-                            pipeline_session.default_bucket(),
-                            constants.WORKLOAD_NAME,
-                            execution_version,
-                            "evaluation"
-                        ]
-                    )
+            [
+                "--model-names", Join(on=",", values=[step.properties.ModelName for step in model_steps]),
+                "--segments", ",".join(segments)
+            ]
+        )
+    else:
+        benchmark_step = get_benchmark_step(
+            "",
+            [
+                ProcessingInput(
+                    source=Join(on="/", values=[testing_uris[0], "x_test.csv"]),
+                    destination="/opt/ml/processing/input/testing"
                 )
             ],
-            code=os.path.join(os.path.dirname(__file__), "code/evaluation.py")
-        ),
-        property_files=[evaluation_report]
-    )
+            ["--model-name", model_steps[0].properties.ModelName]
+        )
+    branch_steps.append(benchmark_step)
+    benchmark_uri = benchmark_step.properties.ProcessingOutputConfig.Outputs["benchmark_metrics"].S3Output.S3Uri
+    for segment, model_step, testing_uri in zip(segments or [None], model_steps, testing_uris):
+        evaluation_steps, conditions = get_evaluation_steps(
+            f"-{segment}" if segment else "",
+            model_step.properties.ModelName,
+            testing_uri,
+            Join(on="/", values=[benchmark_uri, segment]) if segment else benchmark_uri
+        )
+        quality_conditions.extend(conditions)
+        branch_steps.extend(evaluation_steps)
 
     # Create Model Deployment Lambda Step
+    deployment_inputs = {
+        "MODEL_NAME": model_steps[0].properties.ModelName,
+        "INSTANCE_TYPE": instance_type,
+        "WORKLOAD_NAME": f"{constants.WORKLOAD_NAME}",
+        "ENDPOINT_TYPE": constants.ENDPOINT_TYPE,
+        "EXECUTION_START_TIME": ExecutionVariables.START_DATETIME  # Orders the deployments of concurrent executions
+    }
+    if segments:
+        # Host the segment models on a single multi-model endpoint, using the segment as the `TargetModel`
+        deployment_inputs["MODEL_NAMES"] = Join(on=",", values=[step.properties.ModelName for step in model_steps])
+        deployment_inputs["SEGMENTS"] = ",".join(segments)
+    feature_steps = get_feature_steps("")
     deployment_step = LambdaStep(
         name="ModelDeploymentStep",
         lambda_func=Lambda(
             function_arn=lambda_arn
         ),
-        inputs={
-            "MODEL_NAME": model_step.properties.ModelName,
-            "INSTANCE_TYPE": instance_type,
-            "WORKLOAD_NAME": f"{constants.WORKLOAD_NAME}",
-            "ENDPOINT_TYPE": constants.ENDPOINT_TYPE
-        },
+        inputs=deployment_inputs,
         outputs=[
             LambdaOutput(output_name="statusCode", output_type=LambdaOutputTypeEnum.String),
             LambdaOutput(output_name="body", output_type=LambdaOutputTypeEnum.String)
-        ]
+        ],
+        depends_on=feature_steps
     )
 
     # Define the step for pipeline failure
@@ -228,50 +451,153 @@ def get_sagemaker_pipeline(
         name="ModelEvaluationFailure",
         error_message=Join(
             on=" ",
-            values=["Pipeline execution failure: Model Quality (F1 Score) is less than the specified Evaluation Threshold"]
-        )
-    )
-
-    # Create Registration Step
-    model_metrics = ModelMetrics(
-        model_statistics=MetricsSource(
-            s3_uri=automl_step.properties.BestCandidateProperties.ModelInsightsJsonReportPath,
-            content_type="application/json"
-        ),
-        explainability=MetricsSource(
-            s3_uri=automl_step.properties.BestCandidateProperties.ExplainabilityJsonReportPath,
-            content_type="application/json"
-        ),
-    )
-    step_register_model = ModelStep(
-        name="ModelRegistrationStep",
-        step_args=best_model.register(
-            content_types=["text/csv"],
-            response_types=["text/csv"],
-            inference_instances=[instance_type],
-            transform_instances=[instance_type],
-            model_package_group_name=model_package_group_name,
-            approval_status=model_approval_status,
-            model_metrics=model_metrics
+            values=["Pipeline execution failure: Model Quality (F1 Score) is less than the specified Evaluation Threshold, or Model Latency (p99) or Error Rate is greater than the specified Latency Thresholds"]
         )
     )
 
     # Create Conditional Registration/Deployment/Failure Step
     conditional_step = ConditionStep(
         name="ModelQualityCondition",
-        conditions=[
-            ConditionGreaterThanOrEqualTo(
-                left=JsonGet(
-                    step_name=evaluation_step.name,
-                    property_file=evaluation_report,
-                    json_path="classification_metrics.weighted_f1.value"
-                ),
-                right=metric_threshold
-            )
-        ],
-        if_steps=[step_register_model, deployment_step],
+        conditions=quality_conditions,
+        if_steps=register_steps + feature_steps + [deployment_step],
         else_steps=[failure_step]
     )
+    steps = [preprocessing_step] + branch_steps + [conditional_step]
+
+    if constants.FAST_RETRAIN:
+        # Retrain the best candidate of the last AutoML job on the new data, skipping the AutoML search,
+        # unless a full AutoML job is due, or the last fast retrained model failed the quality conditions
+        fast_failure_step = FailStep(
+            name="ModelEvaluationFailure-FastRetrain",
+            error_message=Join(
+                on=" ",
+                values=["Pipeline execution failure: Fast retrained Model Quality (F1 Score) is less than the specified Evaluation Threshold, or Model Latency (p99) or Error Rate is greater than the specified Latency Thresholds. The next execution will run a full AutoML job"]
+            )
+        )
+        retrain_report = PropertyFile(name="retrain", output_name="retrain", path="retrain.json")
+        retrainer = SKLearnProcessor(
+            role=role,
+            framework_version="1.0-1",
+            instance_count=1,
+            instance_type=instance_type,
+            base_job_name=f"{constants.WORKLOAD_NAME}/fast-retrain",
+            sagemaker_session=pipeline_session,
+            env={
+                "WORKLOAD_NAME": constants.WORKLOAD_NAME,
+                "AWS_DEFAULT_REGION": constants.REGION
+            }
+        )
+        retrain_step = ProcessingStep(
+            name="FastRetrainStep",
+            step_args=retrainer.run(
+                outputs=[
+                    ProcessingOutput(
+                        output_name="retrain",
+                        source="/opt/ml/processing/retrain",
+                        destination=Join(on="/", values=["s3:/", pipeline_session.default_bucket(), constants.WORKLOAD_NAME, execution_version, "retrain"])
+                    )
+                ],
+                code=os.path.join(os.path.dirname(__file__), "code/retrain.py"),
+                arguments=[
+                    "--model-package-group", model_package_group_name,
+                    "--pipeline-name", f"{constants.WORKLOAD_NAME}-AutoMLPipeline",
+                    "--failure-step", fast_failure_step.name,
+                    "--step-suffix", "-FastRetrain",
+                    "--training-uri", preprocessing_step.properties.ProcessingOutputConfig.Outputs["training"].S3Output.S3Uri,
+                    "--output-uri", Join(on="/", values=["s3:/", pipeline_session.default_bucket(), constants.WORKLOAD_NAME, execution_version, "fast-retrain"]),
+                    "--full-retrain-interval", full_retrain_interval.to_string(),
+                    "--retrain-mode", retrain_mode
+                ]
+            ),
+            property_files=[retrain_report]
+        )
+        fast_model_name = JsonGet(step_name=retrain_step.name, property_file=retrain_report, json_path="model_name")
+        fast_testing_uri = preprocessing_step.properties.ProcessingOutputConfig.Outputs["testing"].S3Output.S3Uri
+        fast_benchmark_step = get_benchmark_step(
+            "-FastRetrain",
+            [
+                ProcessingInput(
+                    source=Join(on="/", values=[fast_testing_uri, "x_test.csv"]),
+                    destination="/opt/ml/processing/input/testing"
+                )
+            ],
+            ["--model-name", fast_model_name]
+        )
+        fast_evaluation_steps, fast_conditions = get_evaluation_steps(
+            "-FastRetrain",
+            fast_model_name,
+            fast_testing_uri,
+            fast_benchmark_step.properties.ProcessingOutputConfig.Outputs["benchmark_metrics"].S3Output.S3Uri
+        )
+        fast_evaluation_steps.insert(1, fast_benchmark_step)
+
+        # Register the fast retrained model, carrying the AutoML job forward for the next fast retrain
+        registrar = SKLearnProcessor(
+            role=role,
+            framework_version="1.0-1",
+            instance_count=1,
+            instance_type=instance_type,
+            base_job_name=f"{constants.WORKLOAD_NAME}/registration",
+            sagemaker_session=pipeline_session,
+            env={
+                "WORKLOAD_NAME": constants.WORKLOAD_NAME,
+                "AWS_DEFAULT_REGION": constants.REGION
+            }
+        )
+        fast_register_step = ProcessingStep(
+            name="ModelRegistrationStep-FastRetrain",
+            step_args=registrar.run(
+                code=os.path.join(os.path.dirname(__file__), "code/register.py"),
+                arguments=[
+                    "--model-name", fast_model_name,
+                    "--model-package-group", model_package_group_name,
+                    "--approval-status", model_approval_status,
+                    "--instance-type", instance_type,
+                    "--automl-job-name", JsonGet(step_name=retrain_step.name, property_file=retrain_report, json_path="automl_job_name"),
+                    "--training-job-name", JsonGet(step_name=retrain_step.name, property_file=retrain_report, json_path="training_job_name"),
+                    "--evaluation-uri", Join(
+                        on="/",
+                        values=[
+                            fast_evaluation_steps[-1].properties.ProcessingOutputConfig.Outputs["evaluation_metrics"].S3Output.S3Uri,
+                            "evaluation_metrics.json"
+                        ]
+                    )
+                ]
+            )
+        )
+        fast_feature_steps = get_feature_steps("-FastRetrain")
+        fast_deployment_step = LambdaStep(
+            name="ModelDeploymentStep-FastRetrain",
+            lambda_func=Lambda(
+                function_arn=lambda_arn
+            ),
+            inputs={**deployment_inputs, "MODEL_NAME": fast_model_name},
+            outputs=[
+                LambdaOutput(output_name="statusCode", output_type=LambdaOutputTypeEnum.String),
+                LambdaOutput(output_name="body", output_type=LambdaOutputTypeEnum.String)
+            ],
+            depends_on=fast_feature_steps
+        )
+        fast_conditional_step = ConditionStep(
+            name="FastRetrainQualityCondition",
+            conditions=fast_conditions,
+            if_steps=[fast_register_step] + fast_feature_steps + [fast_deployment_step],
+            else_steps=[fast_failure_step]
+        )
+
+        # Run the fast retrain branch, or the full AutoML branch, based on the retrain mode
+        retrain_condition_step = ConditionStep(
+            name="RetrainModeCondition",
+            conditions=[
+                ConditionEquals(
+                    left=JsonGet(step_name=retrain_step.name, property_file=retrain_report, json_path="mode"),
+                    right="FAST"
+                )
+            ],
+            if_steps=fast_evaluation_steps + [fast_conditional_step],
+            else_steps=branch_steps + [conditional_step]
+        )
+        steps = [preprocessing_step, retrain_step, retrain_condition_step]
 
     pipeline = Pipeline(
         name="AutoMLTrainingPipeline",
@@ -282,17 +608,13 @@ def get_sagemaker_pipeline(
             max_runtime,
             model_approval_status,
             metric_threshold,
+            p99_threshold,
+            error_rate_threshold,
+            benchmark_rate,
             data_uri,
             data_file
-        ],
-        steps=[
-            preprocessing_step,
-            automl_step,
-            model_step,
-            batch_inference_step,
-            evaluation_step,
-            conditional_step
-        ],
+        ] + ([retrain_mode, full_retrain_interval] if constants.FAST_RETRAIN else []),
+        steps=steps,
         sagemaker_session=pipeline_session
     )
 
@@ -2,6 +2,22 @@ WORKLOAD_NAME = ""
 REGION = ""
 SM_DOMAIN_ID = ""
 DATA_FILE = ""
+MANIFEST_FILE = ""
 TARGET_ATTRIBUTE = ""
 PERFORMANCE_THRESHOLD = 0.5
-ENDPOINT_TYPE = "SERVERLESS | HOSTED"
\ No newline at end of file
+LATENCY_THRESHOLD = 1000
+BENCHMARK_REQUEST_RATE = 10
+ENDPOINT_TYPE = "SERVERLESS | HOSTED | ASYNC"
+ASYNC_MAX_CONCURRENT_INVOCATIONS = 4
+ASYNC_MAX_INSTANCE_COUNT = 2
+MULTI_MODEL_MAX_INSTANCE_COUNT = 2
+MULTI_MODEL_INVOCATIONS_PER_INSTANCE = 100
+SEGMENT_ATTRIBUTE = ""
+SEGMENTS = []
+ID_ATTRIBUTE = ""
+DATE_ATTRIBUTE = ""
+DATE_FORMAT = "%Y_%m_%d"
+LAUNCH_DATE = ""
+CATEGORICAL_ATTRIBUTES = []
+FAST_RETRAIN = False
+FULL_RETRAIN_INTERVAL_DAYS = 7
@@ -0,0 +1,213 @@
+#!/usr/bin/env python3
+
+""" Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved. """
+""" SPDX-License-Identifier: MIT-0 """
+
+# Runs the pipeline step scripts locally, on directories that mirror `/opt/ml/processing`, using a fast
+# stand-in model in place of the AutoML training, batch transform, and endpoint benchmark steps.
+# Records the wall time, and peak memory, of each step. No AWS access is required.
+
+import os
+import sys
+import json
+import time
+import pickle
+import shutil
+import pathlib
+import subprocess
+import argparse
+import constants
+
+CODE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "components", "pipeline", "code")
+
+
+def stage_step(work_dir: str, name: str, inputs: dict) -> str:
+    # Create the local processing directory for the step, and copy the step inputs into it
+    processing_dir = os.path.join(work_dir, name)
+    for destination, source in inputs.items():
+        target = os.path.join(processing_dir, "input", destination)
+        if os.path.isdir(source):
+            shutil.copytree(source, target)
+        else:
+            pathlib.Path(target).mkdir(parents=True, exist_ok=True)
+            shutil.copy(source, target)
+    pathlib.Path(processing_dir).mkdir(parents=True, exist_ok=True)
+    return processing_dir
+
+
+def run_step(name: str, command: list, processing_dir: str, env: dict = None) -> dict:
+    # Run the step in a child process, to measure the wall time, and peak memory, of the step alone
+    start = time.perf_counter()
+    process = subprocess.Popen(command, env={**os.environ, **(env or {}), "PROCESSING_DIR": processing_dir})
+    _, status, usage = os.wait4(process.pid, 0)
+    wall_time = time.perf_counter() - start
+    process.returncode = os.waitstatus_to_exitcode(status)
+    if process.returncode != 0:
+        raise Exception(f"Step {name} failed with exit code {process.returncode}")
+    # NOTE: `ru_maxrss` is reported in bytes on macOS, and kilobytes on Linux
+    peak_memory = usage.ru_maxrss / (1024 * 1024 if sys.platform == "darwin" else 1024)
+    return {"step": name, "wall_time_seconds": round(wall_time, 3), "peak_memory_mb": round(peak_memory, 1)}
+
+
+def read_features(path: str, columns: list) -> tuple:
+    # Read the test features, and the passthrough identifiers, if any
+    import pandas as pd
+    id_columns = [constants.ID_ATTRIBUTE] if constants.ID_ATTRIBUTE else []
+    df = pd.read_csv(path, header=None, names=id_columns + columns)
+    ids = df[constants.ID_ATTRIBUTE] if id_columns else None
+    return df[columns].select_dtypes(include=["number", "bool"]), ids
+
+
+def train_model(processing_dir: str) -> None:
+    # Stand-in for the `AutoMLTrainingStep`, training a gradient boosting model on the numeric features
+    import pandas as pd
+    from sklearn.ensemble import HistGradientBoostingClassifier
+    df = pd.read_csv(os.path.join(processing_dir, "input", "training", "train_val.csv"))
+    columns = [name for name in df.columns if name != constants.TARGET_ATTRIBUTE]
+    x_train = df[columns].select_dtypes(include=["number", "bool"])
+    model = HistGradientBoostingClassifier(max_iter=50).fit(x_train, df[constants.TARGET_ATTRIBUTE])
+    pathlib.Path(os.path.join(processing_dir, "model")).mkdir(parents=True, exist_ok=True)
+    with open(os.path.join(processing_dir, "model", "model.pkl"), "wb") as f:
+        pickle.dump({"model": model, "columns": columns}, f)
+
+
+def load_model(processing_dir: str, segment: str = "") -> dict:
+    with open(os.path.join(processing_dir, "input", "model", segment, "model.pkl"), "rb") as f:
+        return pickle.load(f)
+
+
+def transform(processing_dir: str) -> None:
+    # Stand-in for the `InferenceTestingStep` batch transform
+    model = load_model(processing_dir)
+    x_test, ids = read_features(os.path.join(processing_dir, "input", "testing", "x_test.csv"), model["columns"])
+    predictions = [str(prediction) for prediction in model["model"].predict(x_test)]
+    if ids is not None:
+        predictions = [f"{player_id},{prediction}" for player_id, prediction in zip(ids, predictions)]
+    pathlib.Path(os.path.join(processing_dir, "output")).mkdir(parents=True, exist_ok=True)
+    with open(os.path.join(processing_dir, "output", "x_test.csv.out"), "w") as f:
+        f.write("\n".join(predictions) + "\n")
+
+
+def benchmark(processing_dir: str) -> None:
+    # Stand-in for the `ModelBenchmarkStep`, measuring the single row prediction latency of the model,
+    # or of each segment model, with a report per segment, like the multi-model benchmark
+    import numpy as np
+    for segment in constants.SEGMENTS or [""]:
+        model = load_model(processing_dir, segment)
+        x_test, _ = read_features(os.path.join(processing_dir, "input", "testing", segment, "x_test.csv"), model["columns"])
+        latencies = []
+        for i in range(min(len(x_test), 500)):
+            start = time.perf_counter()
+            model["model"].predict(x_test.iloc[[i]])
+            latencies.append((time.perf_counter() - start) * 1000)
+        p50, p95, p99 = np.percentile(latencies, [50, 95, 99])
+        report_dict = {
+            "latency_metrics": {
+                "p50_latency_ms": {"value": float(p50)},
+                "p95_latency_ms": {"value": float(p95)},
+                "p99_latency_ms": {"value": float(p99)},
+                "error_rate": {"value": 0.0}
+            }
+        }
+        pathlib.Path(os.path.join(processing_dir, "benchmark", segment)).mkdir(parents=True, exist_ok=True)
+        with open(os.path.join(processing_dir, "benchmark", segment, "benchmark_metrics.json"), "w") as f:
+            f.write(json.dumps(report_dict))
+
+
+def run_pipeline(data_file: str, work_dir: str) -> list:
+    shutil.rmtree(work_dir, ignore_errors=True)
+    env = {
+        "TARGET_ATTRIBUTE": constants.TARGET_ATTRIBUTE,
+        "SEGMENT_ATTRIBUTE": constants.SEGMENT_ATTRIBUTE,
+        "ID_ATTRIBUTE": constants.ID_ATTRIBUTE,
+        "DATE_ATTRIBUTE": constants.DATE_ATTRIBUTE,
+        "DATE_FORMAT": constants.DATE_FORMAT,
+        "LAUNCH_DATE": constants.LAUNCH_DATE,
+        "CATEGORICAL_ATTRIBUTES": ",".join(constants.CATEGORICAL_ATTRIBUTES)
+    }
+    stand_in = [sys.executable, os.path.abspath(__file__), "--step"]
+    profile = []
+
+    # Data preprocessing step
+    preprocessing_dir = stage_step(work_dir, "DataPreprocessingStep", {"": data_file})
+    profile.append(
+        run_step(
+            "DataPreprocessingStep",
+            [sys.executable, os.path.join(CODE_DIR, "preprocessing.py"), "--input-file", os.path.basename(data_file)]
+            + (["--segments", ",".join(constants.SEGMENTS)] if constants.SEGMENTS else []),
+            preprocessing_dir,
+            env=env
+        )
+    )
+
+    # Train a model for each segment, using the same step names as the pipeline
+    model_dirs = {}
+    for segment in constants.SEGMENTS or [""]:
+        suffix = f"-{segment}" if segment else ""
+        training_dir = os.path.join(preprocessing_dir, "output", "training", segment)
+        training_step_dir = stage_step(work_dir, f"AutoMLTrainingStep{suffix}", {"training": training_dir})
+        profile.append(run_step(f"AutoMLTrainingStep{suffix}", stand_in + ["train"], training_step_dir, env=env))
+        model_dirs[segment] = os.path.join(training_step_dir, "model")
+
+    # Benchmark all the segment models in a single step, like the multi-model endpoint benchmark
+    benchmark_step = "ModelBenchmarkStep-MultiModel" if constants.SEGMENTS else "ModelBenchmarkStep"
+    benchmark_inputs = {}
+    for segment, model_dir in model_dirs.items():
+        benchmark_inputs[os.path.join("model", segment)] = model_dir
+        benchmark_inputs[os.path.join("testing", segment)] = os.path.join(preprocessing_dir, "output", "testing", segment)
+    benchmark_dir = stage_step(work_dir, benchmark_step, benchmark_inputs)
+    profile.append(run_step(benchmark_step, stand_in + ["benchmark"], benchmark_dir, env=env))
+
+    # Evaluate the model of each segment
+    for segment, model_dir in model_dirs.items():
+        suffix = f"-{segment}" if segment else ""
+        testing_dir = os.path.join(preprocessing_dir, "output", "testing", segment)
+        transform_dir = stage_step(work_dir, f"InferenceTestingStep{suffix}", {"model": model_dir, "testing": testing_dir})
+        profile.append(run_step(f"InferenceTestingStep{suffix}", stand_in + ["transform"], transform_dir, env=env))
+
+        evaluation_dir = stage_step(
+            work_dir,
+            f"ModelEvaluationStep{suffix}",
+            {
+                "predictions": os.path.join(transform_dir, "output"),
+                "true_labels": os.path.join(testing_dir, "y_test.csv"),
+                "benchmark": os.path.join(benchmark_dir, "benchmark", segment)
+            }
+        )
+        profile.append(
+            run_step(
+                f"ModelEvaluationStep{suffix}",
+                [sys.executable, os.path.join(CODE_DIR, "evaluation.py")],
+                evaluation_dir,
+                env=env
+            )
+        )
+        with open(os.path.join(evaluation_dir, "evaluation", "evaluation_metrics.json"), "r") as f:
+            report = json.load(f)
+        profile[-1]["weighted_f1"] = report["classification_metrics"]["weighted_f1"]["value"]
+        profile[-1]["p99_latency_ms"] = report["latency_metrics"]["p99_latency_ms"]["value"]
+
+    with open(os.path.join(work_dir, "profile.json"), "w") as f:
+        json.dump(profile, f, indent=4)
+    return profile
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--data-file", type=str, default=os.path.join("assets", "examples", "player-churn.csv"))
+    parser.add_argument("--work-dir", type=str, default=".local")
+    parser.add_argument("--step", type=str, choices=["train", "transform", "benchmark"])
+    args = parser.parse_args()
+
+    # Run a single stand-in step, inside the processing directory set by the runner
+    if args.step:
+        {"train": train_model, "transform": transform, "benchmark": benchmark}[args.step](os.environ["PROCESSING_DIR"])
+        sys.exit(0)
+
+    profile = run_pipeline(os.path.abspath(args.data_file), os.path.abspath(args.work_dir))
+    print(f"\n{'Step':<40}{'Wall Time (s)':>15}{'Peak Memory (MB)':>20}")
+    for step in profile:
+        print(f"{step['step']:<40}{step['wall_time_seconds']:>15.3f}{step['peak_memory_mb']:>20.1f}")
+    for step in profile:
+        if "weighted_f1" in step:
+            print(f"{step['step']}: F1 Score {step['weighted_f1']:.4f} (threshold {constants.PERFORMANCE_THRESHOLD}), p99 Latency {step['p99_latency_ms']:.1f}ms (threshold {constants.LATENCY_THRESHOLD}ms)")
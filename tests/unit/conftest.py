@@ -0,0 +1,33 @@
+""" Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved. """
+""" SPDX-License-Identifier: MIT-0 """
+
+import os
+import importlib.util
+import pytest
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# The Lambda runtimes create their AWS clients on import, which only requires a region
+os.environ.setdefault("AWS_DEFAULT_REGION", "us-east-1")
+os.environ.setdefault("POWERTOOLS_TRACE_DISABLED", "1")
+
+
+@pytest.fixture
+def load_module(monkeypatch):
+    # Import a module of the repository, by its relative path, with the given environment variables
+    def load(relative_path: str, name: str, env: dict):
+        for key, value in env.items():
+            monkeypatch.setenv(key, value)
+        spec = importlib.util.spec_from_file_location(name, os.path.join(ROOT_DIR, relative_path))
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+        return module
+    return load
+
+
+@pytest.fixture
+def load_runtime(load_module):
+    # Import the Lambda runtime of a component, with the given environment variables
+    def load(component: str, env: dict):
+        return load_module(os.path.join("components", component, "runtime", "index.py"), f"{component}_runtime", env)
+    return load
@@ -0,0 +1,216 @@
+""" Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved. """
+""" SPDX-License-Identifier: MIT-0 """
+
+import json
+import time
+import datetime
+import pytest
+
+from tests.unit.helpers import client_error
+
+ENDPOINT = "PlayerChurn-Endpoint"
+NOW = 1700000000 * 10**9  # Nanoseconds, as recorded by the deployment queue
+
+
+class FakeTable:
+    # In-memory deployment table, evaluating the conditional writes used by the deployment queue
+    def __init__(self, items: dict = None):
+        self.items = items or {}
+
+    def get_item(self, Key, ConsistentRead=False):
+        item = self.items.get(Key["endpoint_name"])
+        return {"Item": dict(item)} if item else {}
+
+    def put_item(self, Item, ConditionExpression, ExpressionAttributeValues):
+        current = self.items.get(Item["endpoint_name"])
+        if current is not None and current["requested_at"] > ExpressionAttributeValues[":requested_at"]:
+            raise client_error("ConditionalCheckFailedException")
+        self.items[Item["endpoint_name"]] = dict(Item)
+
+    def update_item(self, Key, UpdateExpression, ConditionExpression, ExpressionAttributeNames, ExpressionAttributeValues):
+        current = self.items.get(Key["endpoint_name"])
+        if (
+            current is None
+            or current["status"] != ExpressionAttributeValues[":current_status"]
+            or current["endpoint_config_name"] != ExpressionAttributeValues[":endpoint_config_name"]
+        ):
+            raise client_error("ConditionalCheckFailedException")
+        current["status"] = ExpressionAttributeValues[":status"]
+        if ":applied_at" in ExpressionAttributeValues:
+            current["applied_at"] = ExpressionAttributeValues[":applied_at"]
+
+
+class FakeSageMaker:
+    # Endpoint that reports the given sequence of statuses, and optionally rejects the update
+    def __init__(self, statuses: list, config_name: str = "config-a", modified_at: int = 0, update_error: str = None):
+        self.statuses = statuses
+        self.config_name = config_name
+        self.modified_at = modified_at
+        self.update_error = update_error
+        self.updates = []
+
+    def describe_endpoint(self, EndpointName):
+        status = self.statuses.pop(0) if len(self.statuses) > 1 else self.statuses[0]
+        return {
+            "EndpointName": EndpointName,
+            "EndpointStatus": status,
+            "EndpointConfigName": self.config_name,
+            "LastModifiedTime": datetime.datetime.fromtimestamp(self.modified_at / 1e9, tz=datetime.timezone.utc)
+        }
+
+    def update_endpoint(self, EndpointName, EndpointConfigName):
+        if self.update_error:
+            raise client_error("ValidationException", self.update_error)
+        self.updates.append(EndpointConfigName)
+
+    def create_endpoint_config(self, **kwargs):
+        return {"EndpointConfigArn": f"arn:aws:sagemaker:us-east-1:123456789012:endpoint-config/{kwargs['EndpointConfigName']}"}
+
+    def describe_endpoint_config(self, EndpointConfigName):
+        return {"ProductionVariants": [{"ModelName": "model", "ServerlessConfig": {}}]}
+
+
+class FakeContext:
+    def get_remaining_time_in_millis(self):
+        return 300000
+
+
+def get_event() -> dict:
+    return {
+        "MODEL_NAME": "model",
+        "WORKLOAD_NAME": "PlayerChurn",
+        "INSTANCE_TYPE": "ml.m5.xlarge",
+        "ENDPOINT_TYPE": "SERVERLESS"
+    }
+
+
+@pytest.fixture
+def runtime(load_runtime, monkeypatch):
+    module = load_runtime("endpoint", {"DEPLOYMENT_TABLE": "DeploymentTable"})
+    monkeypatch.setattr(module.time, "sleep", lambda seconds: None)
+    return module
+
+
+def test_older_request_is_superseded(runtime):
+    runtime.deployment_table = FakeTable({
+        ENDPOINT: {"endpoint_name": ENDPOINT, "endpoint_config_name": "config-newer", "requested_at": time.time_ns() + 10**12, "status": "PENDING"}
+    })
+    runtime.sm_client = FakeSageMaker(["InService"])
+    body = json.loads(runtime.lambda_handler(get_event(), FakeContext())["body"])
+    assert body["Status"] == "SUPERSEDED"
+    assert runtime.sm_client.updates == []
+
+
+def test_older_execution_completing_later_is_superseded(runtime):
+    # The fast retrain execution started later, but deployed before the slower full AutoML execution
+    runtime.deployment_table = FakeTable({
+        ENDPOINT: {"endpoint_name": ENDPOINT, "endpoint_config_name": "config-fast", "requested_at": runtime.get_requested_at("2024-01-02T00:00:00.000Z"), "status": "DEPLOYED"}
+    })
+    runtime.sm_client = FakeSageMaker(["InService"])
+    body = json.loads(runtime.lambda_handler({**get_event(), "EXECUTION_START_TIME": "2024-01-01T00:00:00.000Z"}, FakeContext())["body"])
+    assert body["Status"] == "SUPERSEDED"
+    assert runtime.sm_client.updates == []
+
+
+def test_execution_start_time_is_converted_to_nanoseconds(runtime):
+    assert runtime.get_requested_at("2024-01-01T00:00:00.001Z") == 1704067200001000000
+    assert runtime.get_requested_at("2024-01-01T00:00:00.001+00:00") == 1704067200001000000
+
+
+def test_busy_endpoint_is_retried(runtime):
+    runtime.deployment_table = FakeTable()
+    runtime.sm_client = FakeSageMaker(["Updating", "Updating", "InService"])
+    body = json.loads(runtime.lambda_handler(get_event(), FakeContext())["body"])
+    assert body["Status"] == "APPLYING"
+    assert runtime.sm_client.updates == [runtime.deployment_table.items[ENDPOINT]["endpoint_config_name"]]
+
+
+def test_validation_error_on_busy_endpoint_releases_the_lock(runtime):
+    runtime.deployment_table = FakeTable({
+        ENDPOINT: {"endpoint_name": ENDPOINT, "endpoint_config_name": "config-b", "requested_at": 1, "status": "PENDING"}
+    })
+    runtime.sm_client = FakeSageMaker(["InService", "Updating"], update_error="Cannot update in-progress endpoint")
+    assert runtime.apply_deployment(ENDPOINT, "PlayerChurn") == "BUSY"
+    assert runtime.deployment_table.items[ENDPOINT]["status"] == "PENDING"
+
+
+def test_permanent_validation_error_fails_the_deployment(runtime):
+    runtime.deployment_table = FakeTable()
+    runtime.sm_client = FakeSageMaker(["InService"], update_error="Could not find model \"model\"")
+    with pytest.raises(Exception, match="Could not find model"):
+        runtime.lambda_handler(get_event(), FakeContext())
+    assert runtime.deployment_table.items[ENDPOINT]["status"] == "FAILED"
+
+
+def test_completion_after_rollback_fails_the_deployment(runtime):
+    runtime.deployment_table = FakeTable({
+        ENDPOINT: {"endpoint_name": ENDPOINT, "endpoint_config_name": "config-b", "requested_at": 1, "status": "APPLYING", "applied_at": NOW}
+    })
+    runtime.sm_client = FakeSageMaker(["InService"], config_name="config-a", modified_at=NOW + 10**6)
+    runtime.complete_deployment(ENDPOINT, "PlayerChurn")
+    assert runtime.deployment_table.items[ENDPOINT]["status"] == "FAILED"
+
+
+def test_completion_deploys_the_applied_config(runtime):
+    runtime.deployment_table = FakeTable({
+        ENDPOINT: {"endpoint_name": ENDPOINT, "endpoint_config_name": "config-b", "requested_at": 1, "status": "APPLYING", "applied_at": NOW}
+    })
+    runtime.sm_client = FakeSageMaker(["InService"], config_name="config-b", modified_at=NOW + 10**6)
+    runtime.complete_deployment(ENDPOINT, "PlayerChurn")
+    assert runtime.deployment_table.items[ENDPOINT]["status"] == "DEPLOYED"
+
+
+def test_completion_ignores_a_deployment_locked_but_not_applied(runtime):
+    # A concurrent pipeline execution locked `config-b` after the endpoint finished updating to `config-a`
+    runtime.deployment_table = FakeTable({
+        ENDPOINT: {"endpoint_name": ENDPOINT, "endpoint_config_name": "config-b", "requested_at": 1, "status": "APPLYING", "applied_at": NOW + 10**9}
+    })
+    runtime.sm_client = FakeSageMaker(["InService"], config_name="config-a", modified_at=NOW + 10**6)
+    runtime.complete_deployment(ENDPOINT, "PlayerChurn")
+    assert runtime.deployment_table.items[ENDPOINT]["status"] == "APPLYING"
+
+
+class FakeModels:
+    # Segment models with the given container environments
+    def __init__(self, environments: dict):
+        self.environments = environments
+        self.created = []
+
+    def describe_model(self, ModelName):
+        return {
+            "ModelName": ModelName,
+            "ExecutionRoleArn": "arn:aws:iam::123456789012:role/Role",
+            "PrimaryContainer": {
+                "Image": "image",
+                "ModelDataUrl": f"s3://bucket/{ModelName}/model.tar.gz",
+                "Environment": self.environments[ModelName]
+            }
+        }
+
+    def create_model(self, **kwargs):
+        self.created.append(kwargs)
+
+
+class FakeS3:
+    def __init__(self):
+        self.copies = []
+
+    def copy(self, CopySource, Bucket, Key):
+        self.copies.append(Key)
+
+
+def test_multi_model_combines_the_segment_models(runtime):
+    runtime.sm_client = FakeModels({"model-a": {"MODE": "1"}, "model-b": {"MODE": "1"}})
+    runtime.s3_client = FakeS3()
+    name = runtime.create_multi_model(["model-a", "model-b"], ["casual", "hardcore"], "PlayerChurn", "v1")
+    assert name == "PlayerChurn-MultiModel-v1"
+    assert runtime.s3_client.copies == ["PlayerChurn/multi-model/v1/casual.tar.gz", "PlayerChurn/multi-model/v1/hardcore.tar.gz"]
+    assert runtime.sm_client.created[0]["PrimaryContainer"]["Environment"] == {"MODE": "1"}
+
+
+def test_multi_model_rejects_different_container_environments(runtime):
+    runtime.sm_client = FakeModels({"model-a": {"MODE": "1"}, "model-b": {"MODE": "2"}})
+    runtime.s3_client = FakeS3()
+    with pytest.raises(Exception, match="model-b uses a different container environment"):
+        runtime.create_multi_model(["model-a", "model-b"], ["casual", "hardcore"], "PlayerChurn", "v1")
+    assert runtime.s3_client.copies == []
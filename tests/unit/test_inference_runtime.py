@@ -0,0 +1,107 @@
+""" Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved. """
+""" SPDX-License-Identifier: MIT-0 """
+
+import io
+import json
+import pytest
+
+from tests.unit.helpers import client_error
+
+TABLE = "PlayerChurn-Features"
+
+
+class FakeDynamoDB:
+    # In-memory feature table, that only processes half of the keys of each `BatchGetItem` request
+    def __init__(self, items: dict):
+        self.items = items
+        self.requests = []
+
+    def batch_get_item(self, RequestItems):
+        keys = RequestItems[TABLE]["Keys"]
+        self.requests.append(len(keys))
+        processed, unprocessed = keys[:max(1, len(keys) // 2)], keys[max(1, len(keys) // 2):]
+        response = {
+            "Responses": {
+                TABLE: [self.items[key["player_id"]] for key in processed if key["player_id"] in self.items]
+            }
+        }
+        if unprocessed:
+            response["UnprocessedKeys"] = {TABLE: {"Keys": unprocessed}}
+        return response
+
+
+class FakeRuntime:
+    def __init__(self, failing_segments: list = None):
+        self.failing_segments = failing_segments or []
+        self.requests = []
+
+    def invoke_endpoint(self, **request):
+        self.requests.append(request)
+        if request.get("TargetModel", "").replace(".tar.gz", "") in self.failing_segments:
+            raise client_error("ModelError", "Model failed to load")
+        rows = request["Body"].split("\n")
+        return {"Body": io.BytesIO("\n".join("1" for _ in rows).encode("utf-8"))}
+
+
+def get_item(player_id: str, segment: str) -> dict:
+    return {"player_id": player_id, "features": "1,2,3", "segment": segment}
+
+
+@pytest.fixture
+def runtime(load_runtime):
+    def load(segments: str = ""):
+        return load_runtime(
+            "inference",
+            {
+                "ENDPOINT_NAME": "PlayerChurn-Endpoint",
+                "FEATURE_TABLE": TABLE,
+                "ID_ATTRIBUTE": "player_id",
+                "SEGMENTS": segments
+            }
+        )
+    return load
+
+
+def test_get_features_retries_unprocessed_keys(runtime):
+    module = runtime()
+    items = {f"p{i}": get_item(f"p{i}", "casual") for i in range(250)}
+    module.dynamodb = FakeDynamoDB(items)
+    features = module.get_features([f"p{i}" for i in range(250)] + ["unknown"])
+    assert features == items
+    assert max(module.dynamodb.requests) <= module.MAX_LOOKUP_KEYS
+
+
+def test_group_by_segment_skips_unhosted_segments(runtime):
+    module = runtime()
+    features = {
+        "p1": get_item("p1", "casual"),
+        "p2": get_item("p2", "churner"),
+        "p3": get_item("p3", "hardcore")
+    }
+    segments, unhosted = module.group_by_segment(["p1", "p2", "p3", "p4"], features, ["casual", "hardcore"])
+    assert segments == {"casual": ["p1"], "hardcore": ["p3"]}
+    assert unhosted == ["p2"]
+
+
+def test_group_by_segment_without_hosted_segments(runtime):
+    module = runtime()
+    features = {"p1": get_item("p1", "casual"), "p2": get_item("p2", "churner")}
+    segments, unhosted = module.group_by_segment(["p1", "p2"], features, [])
+    assert segments == {"": ["p1", "p2"]}
+    assert unhosted == []
+
+
+def test_handler_reports_failed_segment_batches(runtime):
+    module = runtime(segments="casual,hardcore")
+    module.dynamodb = FakeDynamoDB({
+        "p1": get_item("p1", "casual"),
+        "p2": get_item("p2", "hardcore"),
+        "p3": get_item("p3", "churner")
+    })
+    module.sm_runtime = FakeRuntime(failing_segments=["hardcore"])
+    body = json.loads(module.lambda_handler({"player_ids": ["p1", "p2", "p3", "p4"]}, None)["body"])
+    assert body["predictions"] == {"p1": "1"}
+    assert body["missing"] == ["p4"]
+    assert body["unhosted"] == ["p3"]
+    assert body["errors"] == [{"segment": "hardcore", "player_ids": ["p2"], "message": "Model failed to load"}]
+    assert [request["TargetModel"] for request in module.sm_runtime.requests] == ["casual.tar.gz", "hardcore.tar.gz"]
@@ -0,0 +1,106 @@
+""" Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved. """
+""" SPDX-License-Identifier: MIT-0 """
+
+import io
+import json
+import pytest
+
+from tests.unit.helpers import client_error
+
+BUCKET = "playerchurn-data"
+
+
+class FakeS3:
+    # In-memory bucket, returning the object attributes of single part, and multipart uploads
+    def __init__(self, objects: dict):
+        self.objects = objects
+        self.puts = {}
+
+    def get_object(self, Bucket, Key, VersionId=None):
+        return {"Body": io.BytesIO(self.objects[Key].encode("utf-8"))}
+
+    def get_object_attributes(self, Bucket, Key, ObjectAttributes):
+        if Key not in self.objects:
+            raise client_error("NoSuchKey", "The specified key does not exist.")
+        return self.objects[Key]
+
+    def put_object(self, Bucket, Key, Body):
+        self.puts[Key] = Body
+
+
+class FakeSageMaker:
+    def __init__(self):
+        self.executions = []
+
+    def start_pipeline_execution(self, **kwargs):
+        self.executions.append(kwargs)
+        return {"PipelineExecutionArn": "arn:aws:sagemaker:us-east-1:123456789012:pipeline/test/execution/1"}
+
+
+def get_event(key: str) -> dict:
+    return {"Records": [{"s3": {"bucket": {"name": BUCKET}, "object": {"key": key, "versionId": "v1"}}}]}
+
+
+@pytest.fixture
+def runtime(load_runtime, monkeypatch):
+    module = load_runtime("notification", {"PIPELINE_NAME": "PlayerChurn-AutoMLPipeline", "MANIFEST_FILE": "manifest.json"})
+    sm_client = FakeSageMaker()
+    monkeypatch.setattr(module.boto3, "client", lambda name: sm_client)
+    return module, sm_client
+
+
+def upload(module, parts: list, attributes: dict) -> None:
+    module.s3_client = FakeS3({"raw-data/manifest.json": json.dumps({"parts": parts}), **attributes})
+
+
+def test_multipart_checksum_matches_composite_form(runtime):
+    module, sm_client = runtime
+    upload(
+        module,
+        [{"key": "part-0001.csv", "size": 104857600, "checksum": "Y29tcG9zaXRl-13"}],
+        {
+            "raw-data/part-0001.csv": {
+                "ObjectSize": 104857600,
+                "Checksum": {"ChecksumSHA256": "Y29tcG9zaXRl"},
+                "ObjectParts": {"TotalPartsCount": 13}
+            }
+        }
+    )
+    response = module.lambda_handler(get_event("raw-data/manifest.json"), None)
+    assert response["statusCode"] == 200
+    assert sm_client.executions[0]["PipelineParameters"][1]["Value"] == f"s3://{BUCKET}/raw-data/manifest.json.sagemaker"
+
+
+def test_single_part_checksum_matches(runtime):
+    module, sm_client = runtime
+    upload(
+        module,
+        [{"key": "part-0001.csv", "size": 1024, "checksum": "ZnVsbA=="}],
+        {"raw-data/part-0001.csv": {"ObjectSize": 1024, "Checksum": {"ChecksumSHA256": "ZnVsbA=="}}}
+    )
+    assert module.lambda_handler(get_event("raw-data/manifest.json"), None)["statusCode"] == 200
+    assert len(sm_client.executions) == 1
+
+
+def test_invalid_part_is_reported_without_starting_the_pipeline(runtime):
+    module, sm_client = runtime
+    upload(
+        module,
+        [
+            {"key": "part-0001.csv", "size": 104857600, "checksum": "ZnVsbA=="},
+            {"key": "part-0002.csv", "size": 1024}
+        ],
+        {
+            "raw-data/part-0001.csv": {
+                "ObjectSize": 104857600,
+                "Checksum": {"ChecksumSHA256": "Y29tcG9zaXRl"},
+                "ObjectParts": {"TotalPartsCount": 13}
+            }
+        }
+    )
+    response = module.lambda_handler(get_event("raw-data/manifest.json"), None)
+    assert response["statusCode"] == 400
+    assert sm_client.executions == []
+    report = json.loads(module.s3_client.puts["raw-data/manifest.json.error"])
+    assert report["manifest"] == "raw-data/manifest.json"
+    assert "part-000" in report["error"]
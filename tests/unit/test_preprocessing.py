@@ -0,0 +1,62 @@
+""" Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved. """
+""" SPDX-License-Identifier: MIT-0 """
+
+import pandas as pd
+import pytest
+
+ENV = {
+    "TARGET_ATTRIBUTE": "player_churn",
+    "SEGMENT_ATTRIBUTE": "player_type",
+    "ID_ATTRIBUTE": "player_id",
+    "DATE_ATTRIBUTE": "cohort_id",
+    "DATE_FORMAT": "%Y_%m_%d",
+    "LAUNCH_DATE": "2023_01_01",
+    "CATEGORICAL_ATTRIBUTES": "player_type,platform"
+}
+
+
+@pytest.fixture
+def preprocessing(load_module):
+    return load_module("components/pipeline/code/preprocessing.py", "preprocessing", ENV)
+
+
+def get_players() -> pd.DataFrame:
+    return pd.DataFrame({
+        "player_id": ["a", "b", "c"],
+        "cohort_id": ["2023_01_01", "2023_02_01", "2024_01_01"],
+        "player_type": ["casual", "hardcore", "casual"],
+        "platform": ["ios", "android", "ios"],
+        "session_count": [9, 4, 1],
+        "player_churn": [False, True, False]
+    })
+
+
+def test_date_attribute_is_replaced_with_numeric_features(preprocessing):
+    df = preprocessing.encode_features(get_players())
+    assert "cohort_id" not in df.columns
+    assert list(df["cohort_id_day_of_year"]) == [1, 32, 1]
+    assert list(df["cohort_id_days_since_launch"]) == [0, 31, 365]
+
+
+def test_days_since_launch_uses_the_launch_date_for_every_dataset(preprocessing):
+    # The earliest date of the dataset is not the launch date, so the feature must not shift
+    df = preprocessing.encode_features(get_players().iloc[1:])
+    assert list(df["cohort_id_days_since_launch"]) == [31, 365]
+
+
+def test_categorical_attributes_are_one_hot_encoded(preprocessing):
+    df = preprocessing.encode_features(get_players())
+    assert "player_type" not in df.columns
+    assert "platform" not in df.columns
+    assert list(df["player_type_casual"]) == [1, 0, 1]
+    assert list(df["player_type_hardcore"]) == [0, 1, 0]
+    assert list(df["platform_ios"]) == [1, 0, 1]
+
+
+def test_segment_attribute_is_kept_when_segmented(preprocessing):
+    # The segment attribute splits the dataset, so it is not one-hot encoded
+    df = preprocessing.encode_features(get_players(), segmented=True)
+    assert list(df["player_type"]) == ["casual", "hardcore", "casual"]
+    assert "player_type_casual" not in df.columns
+    assert list(df["platform_android"]) == [0, 1, 0]
+    assert list(df["session_count"]) == [9, 4, 1]
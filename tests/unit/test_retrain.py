@@ -0,0 +1,151 @@
+""" Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved. """
+""" SPDX-License-Identifier: MIT-0 """
+
+import argparse
+import datetime
+import pytest
+
+PIPELINE = "PlayerChurn-AutoMLPipeline"
+FAILURE_STEP = "ModelEvaluationFailure-FastRetrain"
+
+
+class FakeSageMaker:
+    # Pipeline executions, with the steps of the previous execution
+    def __init__(self, steps: list = None, status: str = "Succeeded"):
+        self.steps = steps or []
+        self.status = status
+
+    def list_pipeline_executions(self, **kwargs):
+        return {
+            "PipelineExecutionSummaries": [
+                {"PipelineExecutionArn": "current", "PipelineExecutionStatus": "Executing"},
+                {"PipelineExecutionArn": "previous", "PipelineExecutionStatus": self.status}
+            ]
+        }
+
+    def list_pipeline_execution_steps(self, PipelineExecutionArn):
+        assert PipelineExecutionArn == "previous"
+        return {"PipelineExecutionSteps": self.steps}
+
+    def describe_auto_ml_job(self, AutoMLJobName):
+        return {"AutoMLJobName": AutoMLJobName, **get_automl_job()}
+
+
+def get_args(retrain_mode: str = "AUTO") -> argparse.Namespace:
+    return argparse.Namespace(
+        retrain_mode=retrain_mode,
+        pipeline_name=PIPELINE,
+        failure_step=FAILURE_STEP,
+        step_suffix="-FastRetrain",
+        full_retrain_interval=7
+    )
+
+
+def get_automl_job(days: int = 1) -> dict:
+    return {"CreationTime": datetime.datetime.now(datetime.timezone.utc) - datetime.timedelta(days=days)}
+
+
+@pytest.fixture
+def retrain(load_module):
+    module = load_module("components/pipeline/code/retrain.py", "retrain", {"WORKLOAD_NAME": "PlayerChurn"})
+    module.sm_client = FakeSageMaker([{"StepName": "FastRetrainStep", "StepStatus": "Succeeded"}])
+    return module
+
+
+def test_no_package_runs_a_full_retrain(retrain):
+    assert retrain.get_retrain_mode(get_args(), None, None) == "FULL"
+    assert retrain.get_retrain_mode(get_args("FAST"), None, None) == "FULL"
+
+
+def test_retrain_mode_override(retrain):
+    assert retrain.get_retrain_mode(get_args("FULL"), {}, get_automl_job()) == "FULL"
+    assert retrain.get_retrain_mode(get_args("FAST"), {}, get_automl_job(days=30)) == "FAST"
+
+
+def test_full_retrain_when_the_interval_has_expired(retrain):
+    assert retrain.get_retrain_mode(get_args(), {}, get_automl_job(days=1)) == "FAST"
+    assert retrain.get_retrain_mode(get_args(), {}, get_automl_job(days=7)) == "FULL"
+
+
+def test_full_retrain_after_the_fast_retrain_failed_the_quality_gate(retrain):
+    retrain.sm_client = FakeSageMaker([{"StepName": FAILURE_STEP, "StepStatus": "Succeeded"}], status="Failed")
+    assert retrain.get_retrain_mode(get_args(), {}, get_automl_job()) == "FULL"
+
+
+@pytest.mark.parametrize("step_status", ["Failed", "Stopped"])
+def test_full_retrain_after_a_fast_retrain_step_crashed(retrain, step_status):
+    retrain.sm_client = FakeSageMaker([{"StepName": "ModelBenchmarkStep-FastRetrain", "StepStatus": step_status}], status=step_status)
+    assert retrain.get_retrain_mode(get_args(), {}, get_automl_job()) == "FULL"
+
+
+def test_failed_full_retrain_is_not_a_fast_retrain_failure(retrain):
+    retrain.sm_client = FakeSageMaker([{"StepName": "AutoMLTrainingStep", "StepStatus": "Failed"}], status="Failed")
+    assert retrain.get_retrain_mode(get_args(), {}, get_automl_job()) == "FAST"
+
+
+def test_fast_retrain_failure_falls_back_to_a_full_retrain(retrain, monkeypatch):
+    package = {"CustomerMetadataProperties": {"AutoMLJobName": "automl", "TrainingJobName": "candidate"}}
+    monkeypatch.setattr(retrain, "get_latest_package", lambda group: package)
+    monkeypatch.setattr(retrain, "upload_datasets", lambda training_uri, output_uri: {"train": "s3://bucket/train/"})
+
+    def fail(*args):
+        raise Exception("Training Job Failed")
+    monkeypatch.setattr(retrain, "retrain", fail)
+    report = retrain.get_report(argparse.Namespace(model_package_group="group", training_uri="", output_uri="", **vars(get_args())))
+    assert report == {"mode": "FULL", "model_name": "", "automl_job_name": "automl", "training_job_name": ""}
+
+
+def test_channels_are_rewritten_to_the_new_data(retrain):
+    candidate = {
+        "InputDataConfig": [
+            {
+                "ChannelName": "train",
+                "ContentType": "text/csv;header=present",
+                "InputMode": "File",
+                "ShuffleConfig": {"Seed": 1},
+                "DataSource": {
+                    "S3DataSource": {
+                        "S3DataType": "ManifestFile",
+                        "S3Uri": "s3://automl/train.manifest",
+                        "S3DataDistributionType": "ShardedByS3Key",
+                        "AttributeNames": ["source"]
+                    }
+                }
+            },
+            {
+                "ChannelName": "validation",
+                "ContentType": "text/csv;header=present",
+                "DataSource": {"S3DataSource": {"S3DataType": "S3Prefix", "S3Uri": "s3://automl/validation/"}}
+            }
+        ]
+    }
+    channels = {"train": "s3://bucket/train/", "validation": "s3://bucket/validation/"}
+    assert retrain.get_input_data_config(candidate, channels) == [
+        {
+            "ChannelName": "train",
+            "ContentType": "text/csv;header=present",
+            "InputMode": "File",
+            "DataSource": {
+                "S3DataSource": {"S3DataType": "S3Prefix", "S3Uri": "s3://bucket/train/", "S3DataDistributionType": "ShardedByS3Key"}
+            }
+        },
+        {
+            "ChannelName": "validation",
+            "ContentType": "text/csv;header=present",
+            "DataSource": {
+                "S3DataSource": {"S3DataType": "S3Prefix", "S3Uri": "s3://bucket/validation/", "S3DataDistributionType": "FullyReplicated"}
+            }
+        }
+    ]
+
+
+def test_network_config_is_kept(retrain):
+    candidate = {
+        "TrainingJobName": "candidate",
+        "VpcConfig": {"Subnets": ["subnet"], "SecurityGroupIds": ["sg"]},
+        "EnableNetworkIsolation": True
+    }
+    assert retrain.get_network_config(candidate) == {
+        "VpcConfig": {"Subnets": ["subnet"], "SecurityGroupIds": ["sg"]},
+        "EnableNetworkIsolation": True
+    }